@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+from langchain_core.callbacks import BaseCallbackHandler
+from src.config import WorkflowConfig
+from src.fakes import FakeFirecrawlService, FakeResearchChatModel
+from src.workflow import Workflow
+
+NODES = ["search_sources", "pack_context", "extract_titles", "extract_details", "synthesize"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the research workflow against fake backends")
+    parser.add_argument("--num-results", default="5,10,20", help="Comma-separated search result counts to benchmark")
+    parser.add_argument("--titles", default="4,8", help="Comma-separated advancement title counts to benchmark")
+    parser.add_argument("--queries", type=int, default=8, help="Queries per scenario")
+    parser.add_argument("--workers", type=int, default=4, help="Queries run concurrently")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Simulated Firecrawl latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Simulated LLM latency in seconds per call")
+    parser.add_argument("--page-words", type=int, default=600, help="Words per synthetic page")
+    parser.add_argument("--recorded", metavar="FILE", help="Serve raw Firecrawl search entries from FILE instead of synthetic pages")
+    parser.add_argument("--detail-batch-tokens", type=int, default=6000, help="Prompt token budget per batched detail call (0 = one call per title)")
+    parser.add_argument("--pipelined", action="store_true", help="Stream title extraction and overlap it with detail extraction")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory tracking (tracemalloc slows Python-heavy steps)")
+    parser.add_argument("--checkpoint", action="store_true", help="Include SQLite checkpointing in the measurement")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON to FILE ('-' for stdout)")
+    return parser.parse_args()
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Records the wall time of every LangGraph node run it sees.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = {}
+        self._started: Dict[Any, tuple] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and name and name == metadata.get("langgraph_node"):
+            self._started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            name, start = started
+            self.timings.setdefault(name, []).append(time.perf_counter() - start)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_scenario(args, num_results: int, num_titles: int, cache_dir: str) -> Dict[str, Any]:
+    config = WorkflowConfig(
+        search_num_results=num_results,
+        detail_batch_token_budget=args.detail_batch_tokens,
+        pipelined_titles=args.pipelined,
+        firecrawl_cache_enabled=False,
+        llm_cache_backend="none",
+        results_index_enabled=False,
+        checkpoint_enabled=args.checkpoint,
+        cache_dir=cache_dir
+    )
+    if args.recorded:
+        firecrawl = FakeFirecrawlService.from_recording(args.recorded, latency_seconds=args.search_latency)
+    else:
+        firecrawl = FakeFirecrawlService(latency_seconds=args.search_latency, page_words=args.page_words)
+    llm = FakeResearchChatModel(latency_seconds=args.llm_latency, num_titles=num_titles)
+    timer = NodeTimer()
+    workflow = Workflow(config, firecrawl=firecrawl, llm=llm, callbacks=[timer])
+
+    queries = [f"Benchmark Field {i} -> Benchmark Subtopic {i}" for i in range(args.queries)]
+    semaphore = asyncio.Semaphore(max(1, args.workers))
+    errors = 0
+    latencies: List[float] = []
+    first_advancements: List[float] = []
+
+    async def run_one(query: str):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            first: List[float] = []
+
+            def on_advancement(_):
+                if not first:
+                    first.append(time.perf_counter() - started)
+
+            result = await workflow.arun(query, on_advancement=on_advancement)
+            latencies.append(time.perf_counter() - started)
+            first_advancements.extend(first)
+            errors += len(result.error_logs)
+
+    track_memory = not args.no_memory
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    peak = None
+    try:
+        await asyncio.gather(*(run_one(query) for query in queries))
+        elapsed = time.perf_counter() - start
+        if track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+        await workflow.aclose()
+
+    usage = llm.usage
+    return {
+        "num_results": num_results,
+        "titles": num_titles,
+        "queries": len(queries),
+        "elapsed_s": round(elapsed, 4),
+        "queries_per_s": round(len(queries) / elapsed, 3) if elapsed else None,
+        "peak_memory_mb": round(peak / (1024 * 1024), 2) if peak is not None else None,
+        "llm_calls": usage["calls"],
+        "prompt_tokens": usage["prompt_tokens"],
+        "prompt_tokens_per_query": round(usage["prompt_tokens"] / len(queries)) if queries else 0,
+        "errors": errors,
+        "query_latency_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        "first_advancement_ms": round(statistics.fmean(first_advancements) * 1000, 2) if first_advancements else None,
+        "nodes": {
+            node: {
+                "mean_ms": round(statistics.fmean(values) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2)
+            }
+            for node, values in ((node, timer.timings.get(node, [])) for node in NODES)
+            if values
+        }
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = f"{'results':>7} {'titles':>6} {'q/s':>8} {'latency ms':>10} {'1st adv ms':>10} {'peak MB':>8} {'prompt tok/q':>12} {'errors':>6}  " + \
+        "  ".join(f"{node:>16}" for node in NODES)
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        nodes = "  ".join(
+            f"{r['nodes'][node]['mean_ms']:>9.1f}/{r['nodes'][node]['p95_ms']:<6.1f}" if node in r['nodes'] else f"{'-':>16}"
+            for node in NODES
+        )
+        print(
+            f"{r['num_results']:>7} {r['titles']:>6} {r['queries_per_s']:>8.2f} {r['query_latency_ms'] or '-':>10} "
+            f"{r['first_advancement_ms'] or '-':>10} {r['peak_memory_mb'] if r['peak_memory_mb'] is not None else '-':>8} "
+            f"{r['prompt_tokens_per_query']:>12} {r['errors']:>6}  {nodes}"
+        )
+    print("Node columns: mean/p95 latency in ms")
+
+
+async def amain():
+    args = parse_args()
+    # Per-step INFO logs would dominate both the output and the timings
+    logging.disable(logging.INFO)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="advance-agent-bench-") as cache_dir:
+        for num_results in [int(x) for x in args.num_results.split(",") if x.strip()]:
+            for num_titles in [int(x) for x in args.titles.split(",") if x.strip()]:
+                results.append(await run_scenario(args, num_results, num_titles, cache_dir))
+    print_report(results)
+    if args.json:
+        payload = json.dumps(results, indent=2)
+        if args.json == "-":
+            print(payload)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
@@ -1,70 +1,279 @@
+import argparse
+import asyncio
+import json
+import sys
 from dotenv import load_dotenv
+from src.config import WorkflowConfig
+from src.service import serve
+from src.utils import parse_query
 from src.workflow import Workflow
 
 load_dotenv()
 
 
-def main():
-    workflow = Workflow()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Academic Research Discovery Agent")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the Firecrawl and LLM response caches")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached Firecrawl and LLM responses and store fresh ones")
+    parser.add_argument("--batch", metavar="FILE", help="Run every 'Field, Subtopic' line in FILE ('-' for stdin) and emit JSONL")
+    parser.add_argument("--workers", type=int, default=4, help="Number of queries to run concurrently in batch and serve mode")
+    parser.add_argument("--output", metavar="FILE", help="Write batch JSONL results to FILE instead of stdout")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve research requests over HTTP on PORT with one warm workflow")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind in serve mode and for --metrics-port")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not checkpoint runs to disk")
+    parser.add_argument("--pipeline", action="store_true", help="Start extracting each advancement's details while the remaining titles are still being generated")
+    parser.add_argument("--deep-scrape", action="store_true", help="Scrape each advancement's main link so detail extraction sees the full page")
+    parser.add_argument("--watch", action="store_true", help="Only extract sources not seen in earlier --watch runs of a query, merging them into its stored results")
+    parser.add_argument("--reset-watch", metavar="QUERY", help="Forget the sources and results --watch stored for 'Field, Subtopic' and exit")
+    parser.add_argument("--search", metavar="TEXT", help="Full-text search the advancements indexed by earlier runs and exit")
+    parser.add_argument("--index-first", type=int, default=0, metavar="N", help="Answer a query from the results index without searching when it holds N or more fresh advancements")
+    parser.add_argument("--no-index", action="store_true", help="Neither index results nor reuse indexed advancements")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume an interrupted or failed run from its last completed step")
+    parser.add_argument("--retry-failed", metavar="RUN_ID", help="Re-extract only the advancements that failed in a run")
+    parser.add_argument("--titles-model", default="gpt-4o", metavar="MODEL", help="OpenAI model that lists advancement titles")
+    parser.add_argument("--details-model", default="gpt-4o", metavar="MODEL", help="OpenAI model that extracts advancement details")
+    parser.add_argument("--synthesis-model", default="gpt-4o", metavar="MODEL", help="OpenAI model that writes the synthesis")
+    parser.add_argument("--escalation-model", metavar="MODEL", help="Re-run a step on MODEL when its output fails validation or is incomplete")
+    parser.add_argument("--openai-rpm", type=int, metavar="N", help="Pace OpenAI calls under N requests per minute")
+    parser.add_argument("--openai-tpm", type=int, metavar="N", help="Pace OpenAI calls under N tokens per minute")
+    parser.add_argument("--firecrawl-rpm", type=int, metavar="N", help="Pace Firecrawl calls under N requests per minute")
+    parser.add_argument("--metrics-file", metavar="FILE", help="Write Prometheus text metrics to FILE after every query")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT", help="Serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--trace-file", metavar="FILE", help="Append each run's span tree to FILE as a JSON line")
+    args = parser.parse_args()
+    if args.no_checkpoint and (args.resume or args.retry_failed):
+        parser.error("--resume and --retry-failed read the run's checkpoint; they cannot be used with --no-checkpoint")
+    if args.reset_watch:
+        parsed = parse_query(args.reset_watch)
+        if parsed is None:
+            parser.error("--reset-watch expects a query in the format: Field, Subtopic")
+        args.reset_watch = f"{parsed[0]} -> {parsed[1]}"
+    return args
+
+
+def setup_telemetry(workflow: Workflow, args):
+    """
+    Wire the CLI's metrics and trace outputs to the workflow's telemetry.
+    Returns a callback that flushes the metrics file, if one was requested.
+    """
+    telemetry = workflow.telemetry
+    if telemetry is None:
+        return lambda: None
+    if args.trace_file and telemetry.tracer is not None:
+        def write_trace(tree: dict):
+            with open(args.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(tree, ensure_ascii=False, default=str) + "\n")
+        telemetry.tracer.on_trace = write_trace
+    if args.metrics_port:
+        telemetry.registry.serve(args.metrics_port, host=args.host)
+        print(f"📈 Metrics at http://{args.host}:{args.metrics_port}/metrics")
+    if args.metrics_file:
+        return lambda: telemetry.registry.write_prometheus(args.metrics_file)
+    return lambda: None
+
+
+async def run_batch(workflow: Workflow, source: str, workers: int, output: str = None, on_result=None, watch: bool = False):
+    """
+    Run many queries concurrently on one shared Workflow, writing one JSON line per
+    query as soon as it finishes. Malformed lines are reported as error records.
+    With `watch`, each query only processes sources new since its last sweep.
+    """
+    in_stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    out_stream = open(output, "w", encoding="utf-8") if output else sys.stdout
+    try:
+        lines = [line.strip() for line in in_stream]
+        queries = [line for line in lines if line and not line.startswith("#")]
+        semaphore = asyncio.Semaphore(max(1, workers))
+
+        def emit(record: dict):
+            out_stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out_stream.flush()
+
+        async def run_one(query: str, formatted_query: str):
+            async with semaphore:
+                try:
+                    return query, await workflow.arun(formatted_query, incremental=watch), None
+                except Exception as e:
+                    return query, None, e
+
+        tasks = []
+        for query in queries:
+            parsed = parse_query(query)
+            if parsed is None:
+                emit({"query": query, "error_logs": ["Expected format: Field, Subtopic"]})
+                continue
+            field, subtopic = parsed
+            tasks.append(asyncio.create_task(run_one(query, f"{field} -> {subtopic}")))
+
+        for next_done in asyncio.as_completed(tasks):
+            query, result, error = await next_done
+            if error is not None:
+                emit({"query": query, "error_logs": [str(error)]})
+                continue
+            record = {"query": query, "run_id": result.run_id}
+            if result.output:
+                record.update(result.output.model_dump(mode="json"))
+            record["error_logs"] = result.error_logs
+            emit(record)
+            if on_result:
+                on_result()
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+
+async def amain():
+    args = parse_args()
+    config = WorkflowConfig(
+        firecrawl_cache_enabled=not args.no_cache,
+        llm_cache_backend="none" if args.no_cache else "disk",
+        refresh_cache=args.refresh_cache,
+        checkpoint_enabled=not args.no_checkpoint,
+        deep_scrape_enabled=args.deep_scrape,
+        pipelined_titles=args.pipeline,
+        results_index_enabled=not args.no_index,
+        index_answer_min_results=args.index_first,
+        tracing_enabled=bool(args.trace_file),
+        titles_model=args.titles_model,
+        details_model=args.details_model,
+        synthesis_model=args.synthesis_model,
+        escalation_model=args.escalation_model,
+        openai_requests_per_minute=args.openai_rpm,
+        openai_tokens_per_minute=args.openai_tpm,
+        firecrawl_requests_per_minute=args.firecrawl_rpm
+    )
+    workflow = Workflow(config)
+    flush_metrics = setup_telemetry(workflow, args)
+    try:
+        if args.reset_watch:
+            workflow.watch_store.forget(args.reset_watch)
+            print(f"🧹 Forgot watched sources and results for: {args.reset_watch}")
+        elif args.search:
+            print_search_hits(workflow.results_index.search(args.search))
+        elif args.resume:
+            print_result(await workflow.aresume(args.resume))
+        elif args.retry_failed:
+            print_result(await workflow.aretry_failed(args.retry_failed))
+        elif args.serve:
+            await serve(workflow, args.host, args.serve, max_concurrent_runs=args.workers, on_result=flush_metrics)
+        elif args.batch:
+            await run_batch(workflow, args.batch, args.workers, args.output, on_result=flush_metrics, watch=args.watch)
+        else:
+            await run_interactive(workflow, on_result=flush_metrics, watch=args.watch)
+    finally:
+        flush_metrics()
+        await workflow.aclose()
+
+
+async def run_interactive(workflow: Workflow, on_result=None, watch: bool = False):
     print("\n🧑‍🔬 Academic Research Discovery Agent\nType 'quit' or 'exit' to stop.")
 
     while True:
-        query = input("\n🔍 Research Query (Field, Subtopic): ").strip()
+        query = (await asyncio.to_thread(input, "\n🔍 Research Query (Field, Subtopic): ")).strip()
         if query.lower() in {"quit", "exit"}:
             print("👋 Exiting. Goodbye!")
             break
 
         if query:
             # Validate query format: must contain a comma
-            if ',' not in query or len(query.split(',')) != 2:
+            parsed = parse_query(query)
+            if parsed is None:
                 print("⚠️  Please enter your query in the format: Field, Subtopic (e.g., Computer Science, Distributed Systems)")
                 continue
             # Convert to the internal format expected by the workflow (Field -> Subtopic)
-            field, subtopic = [x.strip() for x in query.split(',', 1)]
+            field, subtopic = parsed
             formatted_query = f"{field} -> {subtopic}"
-            result = workflow.run(formatted_query)
-            print(f"\n📊 Results for: {field} -> {subtopic}")
-            print("=" * 60)
-
-            if result.error_logs:
-                print("❗ Errors encountered:")
-                for err in result.error_logs:
-                    print(f"   - {err}")
-                print("=" * 60)
-
-            if result.advancements:
-                print(f"\n🆕 Latest Advancements in {field} -> {subtopic}:")
-                for i, adv in enumerate(result.advancements, 1):
-                    print(f"\n{i}. 📄 {adv.title}")
-                    if adv.authors:
-                        print(f"   👥 Authors: {', '.join(adv.authors)}")
-                    if adv.date:
-                        print(f"   📅 Date: {adv.date}")
-                    if adv.keywords:
-                        print(f"   🏷️  Keywords: {', '.join(adv.keywords)}")
-                    if adv.impact_statement:
-                        print(f"   💡 Impact: {adv.impact_statement}")
-                    if adv.language:
-                        print(f"   🌐 Language: {adv.language}")
-                    if adv.summary:
-                        print(f"   📝 Summary: {adv.summary}")
-                    if adv.paper_links:
-                        print(f"   📚 Papers: {', '.join(str(link) for link in adv.paper_links)}")
-                    if adv.blog_links:
-                        print(f"   📰 Blogs: {', '.join(str(link) for link in adv.blog_links)}")
-                    if adv.pdf_links:
-                        print(f"   📄 PDFs: {', '.join(str(link) for link in adv.pdf_links)}")
-                    if adv.code_links:
-                        print(f"   💻 Code: {', '.join(str(link) for link in adv.code_links)}")
-            else:
-                print("⚠️  No advancements found for this query.")
-
-            if result.synthesis:
-                print("\n🔬 Synthesis & Trends:")
-                print("-" * 40)
-                print(result.synthesis)
-
-            print("=" * 60)
+            streamed = []
+
+            def show_advancement(adv):
+                if not streamed:
+                    print(f"\n🆕 Latest Advancements in {field} -> {subtopic}:")
+                streamed.append(adv)
+                print_advancement(len(streamed), adv)
+
+            result = await workflow.arun(formatted_query, incremental=watch, on_advancement=show_advancement)
+            # Watch mode results also hold advancements stored by earlier sweeps, so list them all
+            print_result(result, streamed=bool(streamed) and not watch)
+            if on_result:
+                on_result()
+
+
+def print_result(result, streamed: bool = False):
+    """
+    Print a finished run. With `streamed`, the advancements were already
+    printed as they arrived and only the summary and synthesis follow.
+    """
+    field, subtopic = [x.strip() for x in (result.query.split('->') + ['', ''])[:2]]
+    print(f"\n📊 Results for: {field} -> {subtopic}")
+    if result.run_id:
+        print(f"🧾 Run ID: {result.run_id}")
+    print("=" * 60)
+
+    if result.error_logs:
+        print("❗ Errors encountered:")
+        for err in result.error_logs:
+            print(f"   - {err}")
+        if result.failed_titles and result.run_id:
+            print(f"   ↻ Retry failed advancements with: --retry-failed {result.run_id}")
+        print("=" * 60)
+
+    if result.output and result.output.from_index:
+        print(f"📚 Answered from the results index in {result.output.search_time}")
+
+    if result.output and result.output.new_sources is not None:
+        print(f"👀 Watch mode: {result.output.new_sources} new or changed sources since the last sweep")
+
+    if streamed:
+        print(f"\n🆕 {len(result.advancements)} advancements listed above.")
+    elif result.advancements:
+        print(f"\n🆕 Latest Advancements in {field} -> {subtopic}:")
+        for i, adv in enumerate(result.advancements, 1):
+            print_advancement(i, adv)
+    else:
+        print("⚠️  No advancements found for this query.")
+
+    if result.synthesis:
+        print("\n🔬 Synthesis & Trends:")
+        print("-" * 40)
+        print(result.synthesis)
+
+    print("=" * 60)
+
+
+def print_search_hits(hits):
+    if not hits:
+        print("⚠️  No indexed advancements match.")
+        return
+    for i, hit in enumerate(hits, 1):
+        print_advancement(i, hit["advancement"])
+        if hit["queries"]:
+            print(f"   🔎 Found by: {'; '.join(hit['queries'])}")
+
+
+def print_advancement(i: int, adv):
+    print(f"\n{i}. 📄 {adv.title}")
+    if adv.authors:
+        print(f"   👥 Authors: {', '.join(adv.authors)}")
+    if adv.date:
+        print(f"   📅 Date: {adv.date}")
+    if adv.keywords:
+        print(f"   🏷️  Keywords: {', '.join(adv.keywords)}")
+    if adv.impact_statement:
+        print(f"   💡 Impact: {adv.impact_statement}")
+    if adv.language:
+        print(f"   🌐 Language: {adv.language}")
+    if adv.summary:
+        print(f"   📝 Summary: {adv.summary}")
+    if adv.paper_links:
+        print(f"   📚 Papers: {', '.join(str(link) for link in adv.paper_links)}")
+    if adv.blog_links:
+        print(f"   📰 Blogs: {', '.join(str(link) for link in adv.blog_links)}")
+    if adv.pdf_links:
+        print(f"   📄 PDFs: {', '.join(str(link) for link in adv.pdf_links)}")
+    if adv.code_links:
+        print(f"   💻 Code: {', '.join(str(link) for link in adv.code_links)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(amain())
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with optional TTL expiry.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            created_at, value = entry
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class DiskCache:
+    """
+    SQLite-backed cache with TTL expiry and size-bounded LRU eviction.
+    Values are JSON-encoded and zlib-compressed before they are stored.
+    Entry count and total size are kept as running totals, so bounding the
+    cache on every set() does not scan the table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 5000,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_created ON entries(created_at)")
+        self._conn.commit()
+        self._count, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            blob, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._delete(key)
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def set(self, key: str, value: Any) -> None:
+        blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._count += 1
+            self._bytes += len(blob)
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete(key)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._count, self._bytes = 0, 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, total = self._count, self._bytes
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _delete(self, key: str) -> None:
+        # Caller holds the lock
+        row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count -= 1
+            self._bytes -= row[0]
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Expired rows go first, then least recently used.
+        if self.ttl_seconds is not None:
+            cutoff = time.time() - self.ttl_seconds
+            expired, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE created_at < ?", (cutoff,)
+            ).fetchone()
+            if expired:
+                self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+                self._count -= expired
+                self._bytes -= size
+                self.evictions += expired
+        excess = max(self._count - self.max_entries, 0)
+        over_budget = self.max_bytes is not None and self._bytes > self.max_bytes
+        if not excess and not over_budget:
+            return
+        # Walk the LRU end until both bounds hold again
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC")
+        victims = []
+        for key, size in rows:
+            if self._count <= self.max_entries and (self.max_bytes is None or self._bytes <= self.max_bytes):
+                break
+            victims.append((key,))
+            self._count -= 1
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
@@ -0,0 +1,55 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+
+# Tunables for the research workflow
+class WorkflowConfig(BaseModel):
+    titles_model: str = "gpt-4o"  # OpenAI model that lists advancement titles from the search results
+    details_model: str = "gpt-4o"  # OpenAI model that extracts each advancement's structured details
+    synthesis_model: str = "gpt-4o"  # OpenAI model that writes the synthesis
+    escalation_model: Optional[str] = None  # Larger model a step's call is re-run on when its output fails validation or is incomplete (None = no escalation)
+    escalation_min_summary_words: int = Field(default=12, ge=0)  # Extracted summaries shorter than this count as incomplete
+    max_concurrency: int = Field(default=5, ge=1)  # Max parallel LLM calls when extracting advancement details
+    search_num_results: int = Field(default=10, ge=1)  # Search results requested from Firecrawl per query
+    detail_batch_token_budget: int = Field(default=6000, ge=0)  # Prompt tokens per batched detail extraction call (0 = one call per title)
+    detail_batch_max_items: int = Field(default=6, ge=1)  # Most titles extracted by a single batched call
+    pipelined_titles: bool = False  # Stream title extraction and start each title's detail extraction as soon as its line arrives
+    deep_scrape_enabled: bool = False  # Scrape each advancement's main link before detail extraction
+    deep_scrape_concurrency: int = Field(default=8, ge=1)  # Pages scraped in parallel per run
+    deep_scrape_per_domain: int = Field(default=2, ge=1)  # Concurrent scrapes of any one host, across runs
+    deep_scrape_timeout_seconds: float = Field(default=45.0, gt=0)  # Give up on a page after this long
+    deep_scrape_token_budget: int = Field(default=1500, ge=1)  # Tokens of a scraped page's most relevant passages sent to detail extraction
+    max_sources_per_advancement: int = Field(default=3, ge=1)  # Matched sources passed to each detail extraction call
+    dedupe_threshold: float = Field(default=0.8, gt=0, le=1)  # Estimated Jaccard similarity above which sources count as duplicates
+    source_token_budget: int = Field(default=400, ge=1)  # Tokens of relevant passages kept per source
+    title_context_token_budget: int = Field(default=6000, ge=1)  # Total source tokens sent to title extraction
+    firecrawl_max_connections: int = Field(default=20, ge=1)  # Pooled HTTP connections for async Firecrawl calls
+    firecrawl_timeout_seconds: float = Field(default=60.0, gt=0)  # Per-request timeout for async Firecrawl calls
+    cache_dir: str = ".cache"  # Directory for on-disk caches
+    checkpoint_enabled: bool = True  # Checkpoint every node to SQLite so failed runs can be resumed
+    checkpoint_keep_completed: bool = False  # Keep the checkpoints of runs that finished without errors or failed titles
+    content_store_backend: Literal["memory", "disk"] = "memory"  # Where full page markdown and raw Firecrawl payloads are kept
+    firecrawl_cache_enabled: bool = True  # Serve repeated Firecrawl searches/scrapes from disk
+    firecrawl_cache_ttl_seconds: Optional[float] = 6 * 60 * 60  # Age after which cached responses expire (None = never)
+    firecrawl_cache_max_entries: int = Field(default=5000, ge=1)  # LRU bound on cached responses
+    firecrawl_cache_max_bytes: Optional[int] = 256 * 1024 * 1024  # LRU bound on compressed cache size (None = unbounded)
+    llm_cache_backend: Literal["memory", "disk", "none"] = "disk"  # Where completed LLM responses are cached
+    llm_cache_ttl_seconds: Optional[float] = None  # Age after which cached completions expire (None = never)
+    llm_cache_max_entries: int = Field(default=2000, ge=1)  # LRU bound on cached completions
+    refresh_cache: bool = False  # Bypass cached responses and overwrite them with fresh results
+    watch_max_advancements: int = Field(default=100, ge=1)  # Merged advancements kept per watched query, newest first
+    results_index_enabled: bool = True  # Index every extracted advancement in SQLite (FTS5), deduped across runs by paper link
+    index_prefill: bool = True  # Reuse indexed details for titles extracted before instead of calling the LLM again
+    index_reuse_max_age_seconds: Optional[float] = 7 * 24 * 60 * 60  # Age after which indexed details are re-extracted (None = never)
+    index_answer_min_results: int = Field(default=0, ge=0)  # Answer a query from the index without searching when it holds this many fresh advancements and a synthesis (0 = always search)
+    index_answer_max_age_seconds: Optional[float] = 24 * 60 * 60  # Freshness required to answer a query from the index (None = any age)
+    openai_requests_per_minute: Optional[int] = Field(default=None, ge=1)  # OpenAI request quota to pace calls under (None = unpaced)
+    openai_tokens_per_minute: Optional[int] = Field(default=None, ge=1)  # OpenAI token quota to pace calls under (None = unpaced)
+    openai_completion_token_estimate: int = Field(default=800, ge=0)  # Completion tokens reserved per call against the token quota
+    firecrawl_requests_per_minute: Optional[int] = Field(default=None, ge=1)  # Firecrawl request quota to pace async calls under (None = unpaced)
+    rate_limit_max_retries: int = Field(default=5, ge=0)  # Retries of a rate-limited or transiently failing provider call
+    rate_limit_backoff_base_seconds: float = Field(default=1.0, gt=0)  # First retry backoff; doubles per attempt, with full jitter
+    rate_limit_backoff_max_seconds: float = Field(default=60.0, gt=0)  # Cap on a single computed backoff
+    metrics_enabled: bool = True  # Record node/API latency histograms, token and cost counters and cache hit rates
+    tracing_enabled: bool = False  # Also build a span tree per run
+    trace_history: int = Field(default=100, ge=1)  # Finished span trees kept in memory
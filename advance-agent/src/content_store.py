@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Set
+
+
+def content_id(value: Any) -> str:
+    """
+    Content address of a JSON-serializable value.
+    """
+    payload = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryContentStore:
+    """
+    In-process content-addressed store. Each value is kept while at least one
+    owner (typically a workflow run) holds a reference to it.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._refs: Dict[str, Set[str]] = {}
+        self._owned: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, value: Any, owner: str) -> str:
+        key = content_id(value)
+        with self._lock:
+            self._values.setdefault(key, value)
+            self._refs.setdefault(key, set()).add(owner)
+            self._owned.setdefault(owner, set()).add(key)
+        return key
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._values.get(key)
+
+    def release(self, owner: str, keys: Optional[List[str]] = None) -> None:
+        """
+        Drop the owner's references (all of them, or only `keys`) and delete
+        values nobody references any more.
+        """
+        with self._lock:
+            owned = self._owned.get(owner, set())
+            for key in list(owned if keys is None else set(keys) & owned):
+                owned.discard(key)
+                refs = self._refs.get(key)
+                if refs is None:
+                    continue
+                refs.discard(owner)
+                if not refs:
+                    del self._refs[key]
+                    self._values.pop(key, None)
+            if not owned:
+                self._owned.pop(owner, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._values), "owners": len(self._owned)}
+
+
+class DiskContentStore:
+    """
+    SQLite-backed content-addressed store with per-owner reference counts.
+    Values are JSON-encoded and zlib-compressed; they survive restarts until
+    every owner has released them, so interrupted runs can pick them up again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS contents (id TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS refs (
+                id TEXT NOT NULL REFERENCES contents(id) ON DELETE CASCADE,
+                owner TEXT NOT NULL,
+                PRIMARY KEY (id, owner)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_owner ON refs(owner)")
+        self._conn.commit()
+
+    def put(self, value: Any, owner: str) -> str:
+        key = content_id(value)
+        blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO contents (id, value) VALUES (?, ?)", (key, blob))
+            self._conn.execute("INSERT OR IGNORE INTO refs (id, owner) VALUES (?, ?)", (key, owner))
+            self._conn.commit()
+        return key
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM contents WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def release(self, owner: str, keys: Optional[List[str]] = None) -> None:
+        """
+        Drop the owner's references (all of them, or only `keys`) and delete
+        values nobody references any more.
+        """
+        with self._lock:
+            if keys is None:
+                self._conn.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+            else:
+                self._conn.executemany(
+                    "DELETE FROM refs WHERE owner = ? AND id = ?", [(owner, key) for key in keys]
+                )
+            self._conn.execute("DELETE FROM contents WHERE id NOT IN (SELECT id FROM refs)")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0]
+            owners = self._conn.execute("SELECT COUNT(DISTINCT owner) FROM refs").fetchone()[0]
+        return {"entries": entries, "owners": owners}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,272 @@
+import logging
+import math
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .matching import tokenize
+from .utils import normalize_url
+
+logger = logging.getLogger("ResearchWorkflow")
+
+MAX_HASH = (1 << 32) - 1
+RECENCY_TERMS = {"2024", "2025"}
+_ENCODINGS: Dict[str, Any] = {}  # tiktoken encoding per model, or None once loading failed
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tiktoken encoding, falling back to a
+    characters-per-token estimate when the encoding cannot be loaded
+    (e.g. offline and not yet in the tiktoken cache).
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str = "gpt-4o"):
+        self.model = model
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def _get_encoding(self):
+        # Shared across counters so an unavailable encoding is only fetched once per process
+        if self.model not in _ENCODINGS:
+            encoding = None
+            try:
+                import tiktoken
+                encoding = tiktoken.encoding_for_model(self.model)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding for {self.model} unavailable, estimating tokens from length: {e}")
+            _ENCODINGS[self.model] = encoding
+        return _ENCODINGS[self.model]
+
+
+class MinHasher:
+    """
+    One-permutation MinHash over word shingles with LSH banding, for finding
+    near-duplicate documents without comparing every pair. Each shingle is
+    hashed once and binned, so signatures cost O(shingles) rather than
+    O(shingles x permutations).
+    """
+
+    EMPTY = -1  # Marks a bin no shingle fell into
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def shingles(self, text: str) -> Set[int]:
+        words = re.findall(r"\w+", (text or "").lower())
+        if len(words) < self.shingle_size:
+            return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+        return {
+            zlib.crc32(" ".join(words[i:i + self.shingle_size]).encode("utf-8"))
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        signature = [MAX_HASH] * self.num_perm
+        for h in shingles:
+            # Scramble the crc so bins and in-bin ranks are independent
+            h = (h * 0x9E3779B1) & MAX_HASH
+            bucket, rank = h % self.num_perm, h // self.num_perm
+            if rank < signature[bucket]:
+                signature[bucket] = rank
+        return [self.EMPTY if value == MAX_HASH else value for value in signature]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        filled = [(x, y) for x, y in zip(sig_a, sig_b) if x != MinHasher.EMPTY or y != MinHasher.EMPTY]
+        if not filled:
+            return 0.0
+        return sum(1 for x, y in filled if x == y) / len(filled)
+
+    def candidate_pairs(self, signatures: List[Optional[List[int]]]) -> Iterable[Tuple[int, int]]:
+        seen: Set[Tuple[int, int]] = set()
+        for band in range(self.bands):
+            buckets: Dict[Tuple[int, ...], List[int]] = {}
+            start = band * self.rows
+            for doc_id, sig in enumerate(signatures):
+                if sig is None:
+                    continue
+                buckets.setdefault(tuple(sig[start:start + self.rows]), []).append(doc_id)
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        pair = (members[i], members[j])
+                        if pair not in seen:
+                            seen.add(pair)
+                            yield pair
+
+
+class ContextPacker:
+    """
+    Turns raw search results into compact LLM context: drops near-duplicate
+    sources, keeps the passages of each page most relevant to the query, and
+    fits the combined text into a token budget.
+    """
+
+    def __init__(
+        self,
+        token_counter: Optional[TokenCounter] = None,
+        dedupe_threshold: float = 0.8,
+        source_token_budget: int = 400,
+        passage_tokens: int = 120,
+    ):
+        self.tokens = token_counter or TokenCounter()
+        self.hasher = MinHasher()
+        self.dedupe_threshold = dedupe_threshold
+        self.source_token_budget = source_token_budget
+        self.passage_tokens = passage_tokens
+
+    def dedupe(
+        self,
+        sources: List[Dict[str, Any]],
+        markdown_for: Optional[Callable[[Dict[str, Any]], str]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Drop sources whose URL repeats or whose markdown is a near-duplicate of an
+        earlier source. Returns the kept sources and the number dropped.
+        """
+        seen_urls: Set[str] = set()
+        unique: List[Dict[str, Any]] = []
+        for src in sources:
+            url = normalize_url(src.get('url', ''))
+            if url and url in seen_urls:
+                continue
+            if url:
+                seen_urls.add(url)
+            unique.append(src)
+
+        markdown_for = markdown_for or self._markdown
+        signatures = [self.hasher.signature(markdown_for(src)) for src in unique]
+        duplicate_of: Dict[int, int] = {}
+        for i, j in sorted(self.hasher.candidate_pairs(signatures)):
+            if j in duplicate_of:
+                continue
+            if MinHasher.similarity(signatures[i], signatures[j]) >= self.dedupe_threshold:
+                duplicate_of[j] = i
+        kept = [src for doc_id, src in enumerate(unique) if doc_id not in duplicate_of]
+        return kept, len(sources) - len(kept)
+
+    def select_passages(
+        self,
+        markdown: str,
+        query_terms: Set[str],
+        token_budget: Optional[int] = None
+    ) -> Tuple[str, float]:
+        """
+        Pick the highest-scoring passages of a page, up to `token_budget`
+        (source_token_budget by default), and return them in document order
+        along with the page's relevance score.
+        """
+        token_budget = token_budget or self.source_token_budget
+        passages = self._split_passages(markdown)
+        if not passages:
+            return "", 0.0
+        scored = []
+        for position, passage in enumerate(passages):
+            terms = tokenize(passage)
+            if not terms:
+                continue
+            hits = sum(1 for term in terms if term in query_terms)
+            recency = sum(1 for term in terms if term in RECENCY_TERMS)
+            # Favour dense query-term coverage; small bonus for early and recent passages
+            score = (hits + 0.5 * recency) / math.sqrt(len(terms)) + 0.05 / (1 + position)
+            scored.append((score, position, passage))
+
+        chosen = []
+        used = 0
+        for score, position, passage in sorted(scored, key=lambda item: item[0], reverse=True):
+            cost = self.tokens.count(passage)
+            if used + cost > token_budget:
+                continue
+            chosen.append((position, passage, score))
+            used += cost
+        if not chosen:
+            return "", 0.0
+        chosen.sort(key=lambda item: item[0])
+        relevance = max(score for _, _, score in chosen)
+        return "\n\n".join(passage for _, passage, _ in chosen), relevance
+
+    def pack(
+        self,
+        query: str,
+        sources: List[Dict[str, Any]],
+        markdown_for: Optional[Callable[[Dict[str, Any]], str]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Dedupe sources and replace each snippet with its most relevant passages.
+        Sources are returned most relevant first, with the number of duplicates dropped.
+        `markdown_for` resolves a source's full page markdown (defaults to its
+        'markdown' key, then its snippet).
+        """
+        markdown_for = markdown_for or self._markdown
+        query_terms = set(tokenize(query.replace("->", " ")))
+        kept, dropped = self.dedupe(sources, markdown_for)
+        packed = []
+        for src in kept:
+            snippet, relevance = self.select_passages(markdown_for(src), query_terms)
+            packed.append((relevance, {**src, 'snippet': snippet or src.get('snippet', '')}))
+        packed.sort(key=lambda item: item[0], reverse=True)
+        return [src for _, src in packed], dropped
+
+    def join_within_budget(self, texts: List[str], token_budget: int, separator: str = "\n\n") -> str:
+        """
+        Join texts in order until the token budget is reached; the last text that
+        does not fit whole is truncated at a line boundary.
+        """
+        parts = []
+        remaining = token_budget
+        for text in texts:
+            if not text:
+                continue
+            cost = self.tokens.count(text)
+            if cost <= remaining:
+                parts.append(text)
+                remaining -= cost
+                continue
+            lines = []
+            for line in text.split("\n"):
+                line_cost = self.tokens.count(line) + 1
+                if line_cost > remaining:
+                    break
+                lines.append(line)
+                remaining -= line_cost
+            if lines:
+                parts.append("\n".join(lines))
+            break
+        return separator.join(parts)
+
+    def _split_passages(self, markdown: str) -> List[str]:
+        # Paragraphs, with long ones split further so a passage stays near passage_tokens
+        passages = []
+        max_chars = self.passage_tokens * TokenCounter.CHARS_PER_TOKEN
+        for block in re.split(r"\n\s*\n", markdown or ""):
+            block = block.strip()
+            if not block:
+                continue
+            while len(block) > max_chars:
+                cut = block.rfind(". ", 0, max_chars)
+                cut = cut + 1 if cut > max_chars // 2 else max_chars
+                passages.append(block[:cut].strip())
+                block = block[cut:].strip()
+            if block:
+                passages.append(block)
+        return passages
+
+    @staticmethod
+    def _markdown(src: Dict[str, Any]) -> str:
+        return src.get('markdown') or src.get('snippet', '')
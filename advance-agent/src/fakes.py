@@ -0,0 +1,290 @@
+import asyncio
+import json
+import random
+import re
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import PrivateAttr
+from .context import TokenCounter
+from .firecrawl import FirecrawlService
+from .models import ResearchAdvancement
+from .prompts import ResearchDiscoveryPrompts
+
+# Deterministic stand-ins for Firecrawl and the chat model, for running the
+# workflow offline (benchmarks, smoke runs). Nothing here touches the network.
+
+VOCABULARY = (
+    "model training dataset benchmark attention transformer diffusion graph network "
+    "sparse retrieval inference latency quantization agent reasoning robustness protein "
+    "quantum sensor control optimization evaluation scaling alignment multimodal vision "
+    "language kernel compiler memory throughput accuracy simulation 2024 2025 arxiv github"
+).split()
+
+
+def synthetic_slug(subtopic: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (subtopic or "").lower()).strip("-") or "topic"
+
+
+def synthetic_url(subtopic: str, index: int) -> str:
+    return f"https://bench.example.org/{synthetic_slug(subtopic)}/{index}"
+
+
+def _split_query(query: str):
+    field, subtopic = (query.split('->') + ['', ''])[:2]
+    return field.strip(), subtopic.strip()
+
+
+class FakeFirecrawlService:
+    """
+    Drop-in for FirecrawlService that serves synthetic pages, or recorded raw
+    Firecrawl search entries, after a configurable delay. Synthetic pages are
+    seeded from the query so every run sees the same content; every
+    `duplicate_every`-th page repeats its predecessor to exercise dedupe.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        page_words: int = 600,
+        duplicate_every: int = 5,
+        recorded: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.latency_seconds = latency_seconds
+        self.page_words = page_words
+        self.duplicate_every = duplicate_every
+        self.recorded = recorded
+        self.calls = {"search": 0, "scrape": 0}
+
+    @classmethod
+    def from_recording(cls, path: str, latency_seconds: float = 0.0) -> "FakeFirecrawlService":
+        """
+        Load raw Firecrawl search entries (the `data` list of a /v1/search
+        response) from a JSON file.
+        """
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+        if isinstance(recorded, dict):
+            recorded = recorded.get('data', [])
+        return cls(latency_seconds=latency_seconds, recorded=recorded)
+
+    def search_research_content(self, query: str, num_results: int = 10, refresh: bool = False):
+        self.calls["search"] += 1
+        time.sleep(self.latency_seconds)
+        return self._search(query, num_results)
+
+    def scrape_research_page(self, url: str, refresh: bool = False) -> dict:
+        self.calls["scrape"] += 1
+        time.sleep(self.latency_seconds)
+        return self._scrape(url)
+
+    async def asearch_research_content(self, query: str, num_results: int = 10, refresh: bool = False):
+        self.calls["search"] += 1
+        await asyncio.sleep(self.latency_seconds)
+        return self._search(query, num_results)
+
+    async def ascrape_research_page(self, url: str, refresh: bool = False) -> dict:
+        self.calls["scrape"] += 1
+        await asyncio.sleep(self.latency_seconds)
+        return self._scrape(url)
+
+    async def aclose(self) -> None:
+        return None
+
+    def _search(self, query: str, num_results: int) -> List[Dict[str, Any]]:
+        if self.recorded is not None:
+            entries = self.recorded[:num_results]
+        else:
+            _, subtopic = _split_query(query)
+            entries = [self._entry(subtopic, i) for i in range(num_results)]
+        return FirecrawlService._normalize_search_results(entries)
+
+    def _scrape(self, url: str) -> dict:
+        markdown = self._page(url, url.rsplit("/", 1)[-1])
+        return {'url': url, 'markdown': markdown, 'status': 'success', 'raw': {'markdown': markdown}}
+
+    def _entry(self, subtopic: str, index: int) -> Dict[str, Any]:
+        source = index - 1 if self.duplicate_every and index and index % self.duplicate_every == 0 else index
+        title = f"{subtopic} advancement {index}"
+        return {
+            'url': synthetic_url(subtopic, index),
+            'title': title,
+            'markdown': f"# {title}\n\n" + self._page(subtopic, source),
+            'metadata': {'title': title, 'sourceURL': synthetic_url(subtopic, index)}
+        }
+
+    def _page(self, topic: str, index: Any) -> str:
+        rng = random.Random(zlib.crc32(f"{topic}|{index}".encode("utf-8")))
+        topic_terms = re.findall(r"\w+", topic.lower())
+        words = [rng.choice(VOCABULARY) for _ in range(self.page_words)]
+        # Sprinkle the topic terms in so relevance scoring has something to find
+        for position in range(0, len(words), 17):
+            if topic_terms:
+                words[position] = rng.choice(topic_terms)
+        paragraphs = []
+        for start in range(0, len(words), 60):
+            sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(start, min(start + 60, len(words)), 12)]
+            paragraphs.append(" ".join(sentences))
+        return "\n\n".join(paragraphs)
+
+
+class FakeResearchChatModel(BaseChatModel):
+    """
+    Chat model stand-in that answers the workflow's prompts with canned output:
+    `num_titles` title lines pointing at FakeFirecrawlService URLs, a
+    ResearchAdvancement per detail call (a list of them for batched calls) and
+    a fixed-length synthesis. Each call waits `latency_seconds` and records
+    prompt/completion token counts; streamed calls spread that wait over
+    their lines. With `invalid_every` = n, every n-th
+    batched entry lacks its summary, to exercise the single-item fallback;
+    with `incomplete_every` = n, every n-th single-item call returns a
+    one-word summary, to exercise model escalation.
+    """
+
+    latency_seconds: float = 0.0
+    num_titles: int = 8
+    completion_tokens: int = 200
+    invalid_every: int = 0
+    incomplete_every: int = 0
+
+    _token_counter: TokenCounter = PrivateAttr(default_factory=TokenCounter)
+    _single_calls: int = PrivateAttr(default=0)
+    _usage: Dict[str, int] = PrivateAttr(default_factory=lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-research-chat"
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        return dict(self._usage)
+
+    def reset_usage(self) -> None:
+        self._usage.update(calls=0, prompt_tokens=0, completion_tokens=0)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        # The workflow asks for ResearchAdvancement, or a batch as an OpenAI tool dict
+        respond = self._advancement if schema is ResearchAdvancement else self._advancement_batch
+
+        def invoke(messages: Sequence[BaseMessage]):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(blocking=True)
+            time.sleep(self.latency_seconds)
+            return respond(messages)
+
+        async def ainvoke(messages: Sequence[BaseMessage]):
+            # A real structured call goes through the model, and so through its rate limiter
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire(blocking=True)
+            await asyncio.sleep(self.latency_seconds)
+            return respond(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="FakeStructuredOutput")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._respond(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._respond(messages)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages).generations[0].message
+        lines = str(message.content).splitlines(keepends=True) or [""]
+        for line in lines:
+            await asyncio.sleep(self.latency_seconds / len(lines))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=line))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt_tokens = self._record(messages)
+        system, user = self._texts(messages)
+        if system == ResearchDiscoveryPrompts.ADVANCEMENT_TITLES_SYSTEM:
+            subtopic = self._field(user, "Subtopic")
+            content = "\n".join(
+                f"{subtopic} advancement {i} [{synthetic_url(subtopic, i)}]" for i in range(self.num_titles)
+            )
+        else:
+            content = " ".join(VOCABULARY[i % len(VOCABULARY)] for i in range(self.completion_tokens))
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens
+            }
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _advancement(self, messages: Sequence[BaseMessage]) -> ResearchAdvancement:
+        self._record(messages)
+        _, user = self._texts(messages)
+        fields = self._advancement_fields(self._field(user, "Advancement Title"))
+        self._single_calls += 1
+        if self.incomplete_every and self._single_calls % self.incomplete_every == 0:
+            fields["summary"] = fields["title"].split()[0]
+        return ResearchAdvancement(**fields)
+
+    def _advancement_batch(self, messages: Sequence[BaseMessage]) -> Dict[str, Any]:
+        _, user = self._texts(messages)
+        titles = [title.strip() for title in re.findall(r"^Advancement Title:\s*(.*)$", user, re.MULTILINE)]
+        self._record(messages, outputs=len(titles))
+        items = []
+        for position, title in enumerate(titles, 1):
+            item = self._advancement_fields(title)
+            if self.invalid_every and position % self.invalid_every == 0:
+                del item["summary"]
+            items.append(item)
+        return {"advancements": items}
+
+    def _advancement_fields(self, title: str) -> Dict[str, Any]:
+        words = " ".join(VOCABULARY[i % len(VOCABULARY)] for i in range(max(self.completion_tokens - 20, 0)))
+        return {
+            "title": title,
+            "summary": f"{title}: {words}",
+            "keywords": VOCABULARY[:3],
+            "paper_links": [f"https://arxiv.org/abs/2501.{zlib.crc32(title.encode('utf-8')) % 100000:05d}"],
+            "date": "2025"
+        }
+
+    def _record(self, messages: Sequence[BaseMessage], outputs: int = 1) -> int:
+        prompt_tokens = sum(self._token_counter.count(str(message.content)) for message in messages)
+        self._usage["calls"] += 1
+        self._usage["prompt_tokens"] += prompt_tokens
+        self._usage["completion_tokens"] += self.completion_tokens * outputs
+        return prompt_tokens
+
+    @staticmethod
+    def _texts(messages: Sequence[BaseMessage]):
+        system = next((str(m.content) for m in messages if m.type == "system"), "")
+        user = "\n".join(str(m.content) for m in messages if m.type == "human")
+        return system, user
+
+    @staticmethod
+    def _field(text: str, name: str) -> str:
+        match = re.search(rf"^{re.escape(name)}:\s*(.*)$", text, re.MULTILINE)
+        return match.group(1).strip() if match else ""
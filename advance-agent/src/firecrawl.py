@@ -1,6 +1,15 @@
+import asyncio
+import contextlib
 import os
+import weakref
+from typing import Any, Dict, List, Optional
+import httpx
 from firecrawl import FirecrawlApp, ScrapeOptions
 from dotenv import load_dotenv
+from .cache import DiskCache, cache_key
+from .metrics import Telemetry
+from .ratelimit import RateLimitScheduler
+from .utils import normalize_query, normalize_url
 import logging
 
 load_dotenv()
@@ -8,10 +17,33 @@ load_dotenv()
 class FirecrawlService:
     """
     Service for searching and scraping web content using Firecrawl, adapted for academic research and advancements analysis.
+    Responses are served from an optional on-disk cache when one is provided.
+    The async methods talk to the REST API over a pooled httpx.AsyncClient, one per event loop.
+    API calls are timed and counted when a Telemetry instance is provided.
+    With a RateLimitScheduler, async API calls are paced under the "firecrawl"
+    limiter and transient failures (429, 5xx, timeouts) are retried.
     """
 
-    def __init__(self):
+    SEARCH_SUFFIX = "research advancements 2024 2025 arXiv IEEE Nature blog github"
+    SCRAPE_FORMATS = ["markdown"]
+
+    def __init__(
+        self,
+        cache: Optional[DiskCache] = None,
+        max_connections: int = 20,
+        timeout_seconds: float = 60.0,
+        telemetry: Optional[Telemetry] = None,
+        scheduler: Optional[RateLimitScheduler] = None
+    ):
+        self.cache = cache
+        self.telemetry = telemetry
+        self.scheduler = scheduler
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
         api_key = os.getenv("FIRECRAWL_API_KEY")
+        self.api_key = api_key
+        self.api_url = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev").rstrip("/")
 
         self.logger = logging.getLogger("Firecrawl")
         self.logger.setLevel(logging.DEBUG)
@@ -39,31 +71,32 @@ class FirecrawlService:
             self.logger.critical(f"Failed to initialize FirecrawlApp: {e}")
             raise
 
-    def search_research_content(self, query: str, num_results: int = 10):
+    def search_research_content(self, query: str, num_results: int = 10, refresh: bool = False):
         """
         Search for recent research papers, blogs, and technical content related to the query.
         Returns a list of dicts with at least 'title', 'url', and 'snippet' for each result.
+        Set refresh=True to bypass the cache and overwrite any stored entry.
         """
+        key = cache_key("search", normalize_query(query), num_results, self.SCRAPE_FORMATS)
+        cached = self._cache_get(key, refresh)
+        if cached is not None:
+            self.logger.info(f"Cache hit for search: query='{query}', num_results={num_results}")
+            return cached
         try:
             self.logger.info(f"Searching for research content: query='{query}', num_results={num_results}")
-            result = self.app.search(
-                query=f"{query} research advancements 2024 2025 arXiv IEEE Nature blog github",
-                limit=num_results,
-                scrape_options=ScrapeOptions(
-                    formats=["markdown"]
+            with self._track("search"):
+                result = self.app.search(
+                    query=f"{query} {self.SEARCH_SUFFIX}",
+                    limit=num_results,
+                    scrape_options=ScrapeOptions(
+                        formats=self.SCRAPE_FORMATS
+                    )
                 )
-            )
             if hasattr(result, 'data'):
                 self.logger.info(f"Search completed. {len(result.data)} results found.")
-                # Normalize results for downstream use
-                normalized = []
-                for entry in result.data:
-                    normalized.append({
-                        'title': entry.get('metadata', {}).get('title', ''),
-                        'url': entry.get('url', ''),
-                        'snippet': entry.get('markdown', '')[:1000],
-                        'raw': entry
-                    })
+                normalized = self._normalize_search_results(result.data)
+                if normalized:
+                    self._cache_set(key, normalized)
                 return normalized
             else:
                 self.logger.warning("No data attribute in Firecrawl search result.")
@@ -72,25 +105,34 @@ class FirecrawlService:
             self.logger.error(f"Error during search_research_content: {e}", exc_info=True)
             return []
 
-    def scrape_research_page(self, url: str) -> dict:
+    def scrape_research_page(self, url: str, refresh: bool = False) -> dict:
         """
         Scrape the content of a research paper, blog, or technical page by URL.
         Returns a dict with at least 'markdown', 'url', and 'status'.
+        Set refresh=True to bypass the cache and overwrite any stored entry.
         """
+        key = cache_key("scrape", normalize_url(url), self.SCRAPE_FORMATS)
+        cached = self._cache_get(key, refresh)
+        if cached is not None:
+            self.logger.info(f"Cache hit for scrape: {url}")
+            return cached
         try:
             self.logger.info(f"Scraping URL: {url}")
-            result = self.app.scrape_url(
-                url,
-                formats=["markdown"]
-            )
+            with self._track("scrape"):
+                result = self.app.scrape_url(
+                    url,
+                    formats=self.SCRAPE_FORMATS
+                )
             if result and hasattr(result, 'markdown') and result.markdown:
                 self.logger.info(f"Scraping successful for URL: {url} (content length: {len(result.markdown)})")
-                return {
+                page = {
                     'url': url,
                     'markdown': result.markdown,
                     'status': 'success',
                     'raw': result
                 }
+                self._cache_set(key, {**page, 'raw': result.model_dump() if hasattr(result, 'model_dump') else None})
+                return page
             else:
                 self.logger.warning(f"Scraping returned no markdown content for URL: {url}")
                 return {
@@ -106,4 +148,149 @@ class FirecrawlService:
                 'markdown': '',
                 'status': 'error',
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    async def asearch_research_content(self, query: str, num_results: int = 10, refresh: bool = False):
+        """
+        Async variant of search_research_content() over the pooled HTTP client.
+        """
+        key = cache_key("search", normalize_query(query), num_results, self.SCRAPE_FORMATS)
+        cached = self._cache_get(key, refresh)
+        if cached is not None:
+            self.logger.info(f"Cache hit for search: query='{query}', num_results={num_results}")
+            return cached
+        try:
+            self.logger.info(f"Searching for research content: query='{query}', num_results={num_results}")
+            data = await self._acall("search", "/v1/search", {
+                'query': f"{query} {self.SEARCH_SUFFIX}",
+                'limit': num_results,
+                'scrapeOptions': {'formats': self.SCRAPE_FORMATS}
+            })
+            if isinstance(data, list):
+                self.logger.info(f"Search completed. {len(data)} results found.")
+                normalized = self._normalize_search_results(data)
+                if normalized:
+                    self._cache_set(key, normalized)
+                return normalized
+            else:
+                self.logger.warning("No data attribute in Firecrawl search result.")
+                return []
+        except Exception as e:
+            self.logger.error(f"Error during asearch_research_content: {e}", exc_info=True)
+            return []
+
+    async def ascrape_research_page(self, url: str, refresh: bool = False) -> dict:
+        """
+        Async variant of scrape_research_page() over the pooled HTTP client.
+        """
+        key = cache_key("scrape", normalize_url(url), self.SCRAPE_FORMATS)
+        cached = self._cache_get(key, refresh)
+        if cached is not None:
+            self.logger.info(f"Cache hit for scrape: {url}")
+            return cached
+        try:
+            self.logger.info(f"Scraping URL: {url}")
+            data = await self._acall("scrape", "/v1/scrape", {'url': url, 'formats': self.SCRAPE_FORMATS})
+            markdown = (data or {}).get('markdown') or ''
+            if markdown:
+                self.logger.info(f"Scraping successful for URL: {url} (content length: {len(markdown)})")
+                page = {
+                    'url': url,
+                    'markdown': markdown,
+                    'status': 'success',
+                    'raw': data
+                }
+                self._cache_set(key, page)
+                return page
+            else:
+                self.logger.warning(f"Scraping returned no markdown content for URL: {url}")
+                return {
+                    'url': url,
+                    'markdown': '',
+                    'status': 'no_content',
+                    'raw': data
+                }
+        except Exception as e:
+            self.logger.error(f"Error during ascrape_research_page for URL {url}: {e}", exc_info=True)
+            return {
+                'url': url,
+                'markdown': '',
+                'status': 'error',
+                'error': str(e)
+            }
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP client bound to the running event loop, if any.
+        """
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.api_url,
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def _acall(self, operation: str, path: str, payload: Dict[str, Any]) -> Any:
+        async def attempt():
+            with self._track(operation):
+                return await self._apost(path, payload)
+
+        if self.scheduler is None:
+            return await attempt()
+        return await self.scheduler.run("firecrawl", attempt)
+
+    async def _apost(self, path: str, payload: Dict[str, Any]) -> Any:
+        response = await self._async_client().post(path, json=payload)
+        response.raise_for_status()
+        body = response.json()
+        if not body.get('success'):
+            raise Exception(f"Firecrawl request to {path} failed: {body.get('error', body)}")
+        return body.get('data')
+
+    @staticmethod
+    def _normalize_search_results(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Normalize results for downstream use
+        normalized = []
+        for entry in entries:
+            normalized.append({
+                'title': entry.get('metadata', {}).get('title', '') or entry.get('title', ''),
+                'url': entry.get('url', ''),
+                'snippet': (entry.get('markdown') or '')[:1000],
+                'raw': entry
+            })
+        return normalized
+
+    def _track(self, operation: str):
+        if self.telemetry is None:
+            return contextlib.nullcontext()
+        return self.telemetry.external_call("firecrawl", operation)
+
+    def _cache_get(self, key: str, refresh: bool):
+        if self.cache is None or refresh:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            self.logger.warning(f"Cache read failed, falling back to Firecrawl: {e}")
+            return None
+
+    def _cache_set(self, key: str, value) -> None:
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(key, value)
+        except Exception as e:
+            self.logger.warning(f"Cache write failed: {e}")
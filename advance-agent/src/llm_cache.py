@@ -0,0 +1,55 @@
+from typing import Any, Dict, Optional, Sequence, Union
+import re
+import warnings
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from .cache import DiskCache, MemoryCache, cache_key
+
+# The runtime stream flag among an llm_string's call parameters ("...---[('stop', None), ('stream', True)]")
+STREAM_PARAM = re.compile(r", \('stream', (?:True|False)\)")
+
+
+class ResearchLLMCache(BaseCache):
+    """
+    Content-addressed cache for chat model completions.
+
+    LangChain hands every lookup the serialized messages plus an llm_string that
+    covers the model name, temperature and any bound tools, so structured-output
+    calls are keyed by their schema as well. Both are hashed into a single key
+    and stored in a MemoryCache or DiskCache backend. Whether the completion
+    was streamed is left out of the key, so streamed and plain calls with the
+    same prompt share entries.
+    """
+
+    def __init__(self, backend: Union[MemoryCache, DiskCache], refresh: bool = False):
+        self.backend = backend
+        self.refresh = refresh  # Skip lookups but still store fresh completions
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self.refresh:
+            return None
+        value = self.backend.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            generations = [loads(generation) for generation in value]
+        # Lets metrics tell replayed responses from billed ones
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), "cached": True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.backend.set(self._key(prompt, llm_string), [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return cache_key(STREAM_PARAM.sub("", llm_string), prompt)
@@ -0,0 +1,119 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Set
+from .utils import normalize_url
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "the", "to", "via", "with", "new", "using", "towards", "toward",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [tok for tok in TOKEN_PATTERN.findall((text or "").lower()) if tok not in STOPWORDS]
+
+
+def char_ngrams(text: str, n: int = 3) -> Set[str]:
+    compact = " ".join(TOKEN_PATTERN.findall((text or "").lower()))
+    if len(compact) < n:
+        return {compact} if compact else set()
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+
+class SourceIndex:
+    """
+    Index over search results for matching advancement titles to their sources.
+    Combines a normalized-URL hash map with a BM25-weighted token index over
+    titles and snippets and a character n-gram index over titles for fuzzy hits.
+    Build it once per run, then call lookup() per advancement.
+    """
+
+    TITLE_WEIGHT = 3  # Title tokens count this many times relative to snippet tokens
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, sources: List[Dict[str, Any]], ngram_size: int = 3):
+        self.sources = sources
+        self.ngram_size = ngram_size
+        self.url_map: Dict[str, List[int]] = defaultdict(list)
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.ngram_postings: Dict[str, List[int]] = defaultdict(list)
+        self.title_ngram_counts: List[int] = []
+        self.doc_lengths: List[int] = []
+
+        for doc_id, src in enumerate(sources):
+            url = normalize_url(src.get('url', ''))
+            if url:
+                self.url_map[url].append(doc_id)
+
+            terms = Counter()
+            for tok in tokenize(src.get('title', '')):
+                terms[tok] += self.TITLE_WEIGHT
+            for tok in tokenize(src.get('snippet', '')):
+                terms[tok] += 1
+            for tok, tf in terms.items():
+                self.postings[tok][doc_id] = tf
+            self.doc_lengths.append(sum(terms.values()))
+
+            grams = char_ngrams(src.get('title', ''), ngram_size)
+            for gram in grams:
+                self.ngram_postings[gram].append(doc_id)
+            self.title_ngram_counts.append(len(grams))
+
+        avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        # Per-document BM25 length normalization, precomputed so lookups only add
+        self.doc_norms = [
+            self.K1 * (1 - self.B + self.B * length / (avg_doc_length or 1))
+            for length in self.doc_lengths
+        ]
+
+    def lookup(self, title: str, main_link: str = "", limit: int = 3, min_score: float = 0.5) -> List[Dict[str, Any]]:
+        """
+        Return up to `limit` sources for an advancement, best match first.
+        An exact normalized-URL hit on main_link always ranks first; remaining
+        slots are filled by fuzzy title/snippet relevance above `min_score`.
+        """
+        if not self.sources:
+            return []
+
+        ranked: List[int] = []
+        if main_link:
+            ranked.extend(self.url_map.get(normalize_url(main_link), []))
+
+        scores = self._score(title)
+        for doc_id, score in heapq.nlargest(limit + len(ranked), scores.items(), key=lambda item: item[1]):
+            if len(ranked) >= limit:
+                break
+            if score < min_score or doc_id in ranked:
+                continue
+            ranked.append(doc_id)
+        return [self.sources[doc_id] for doc_id in ranked[:limit]]
+
+    def _score(self, title: str) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        n_docs = len(self.sources)
+
+        # BM25 over the query title's tokens
+        for tok in set(tokenize(title)):
+            docs = self.postings.get(tok)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                scores[doc_id] += idf * tf * (self.K1 + 1) / (tf + self.doc_norms[doc_id])
+
+        # Character n-gram Jaccard against source titles catches reworded or
+        # inflected titles that share few exact tokens
+        query_grams = char_ngrams(title, self.ngram_size)
+        if query_grams:
+            overlaps: Dict[int, int] = defaultdict(int)
+            for gram in query_grams:
+                for doc_id in self.ngram_postings.get(gram, ()):
+                    overlaps[doc_id] += 1
+            for doc_id, overlap in overlaps.items():
+                union = len(query_grams) + self.title_ngram_counts[doc_id] - overlap
+                scores[doc_id] += 2.0 * overlap / union if union else 0.0
+        return scores
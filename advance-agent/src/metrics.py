@@ -0,0 +1,491 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per million (prompt, completion) tokens; dated model names match by prefix
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+METRICS = {
+    "research_node_duration_seconds": ("histogram", "Wall time of each workflow node"),
+    "research_node_errors_total": ("counter", "Workflow node runs that raised"),
+    "research_external_call_duration_seconds": ("histogram", "Latency of Firecrawl and LLM API calls"),
+    "research_external_calls_total": ("counter", "Firecrawl and LLM API calls by outcome"),
+    "research_llm_tokens_total": ("counter", "LLM tokens reported in response metadata"),
+    "research_llm_cost_usd_total": ("counter", "Estimated LLM spend from MODEL_PRICES"),
+    "research_cache_hits_total": ("counter", "Cache lookups served from cache"),
+    "research_cache_misses_total": ("counter", "Cache lookups that fell through"),
+    "research_cache_entries": ("gauge", "Entries currently held by a cache"),
+    "research_cache_hit_ratio": ("gauge", "Hits / lookups since start"),
+    "research_rate_limit_wait_seconds": ("histogram", "Time calls spent queued for a provider's rate limit"),
+    "research_rate_limit_retries_total": ("counter", "Provider calls retried after a rate limit or transient error"),
+    "research_llm_escalations_total": ("counter", "LLM step calls re-run on the escalation model"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+_current_span: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("research_current_span", default=None)
+
+
+def model_price(model: str) -> Optional[Tuple[float, float]]:
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    prefixes = [name for name in MODEL_PRICES if model.startswith(name + "-")]
+    return MODEL_PRICES[max(prefixes, key=len)] if prefixes else None
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus layout.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by name and labels, plus
+    collectors that are read at export time (e.g. cache stats). Rendered in
+    the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """
+        Register a callable yielding (name, labels, value) samples on every export.
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Plain-dict view of every series, for JSON output and tests.
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {"labels": dict(key), "count": h.count, "sum": h.sum, "buckets": h.cumulative()}
+                    for key, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        gauges: Dict[str, List[Dict[str, Any]]] = {}
+        for name, labels, value in self._collect():
+            gauges.setdefault(name, []).append({"labels": labels, "value": value})
+        return {"counters": counters, "histograms": histograms, "collected": gauges}
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, default_kind: str):
+            kind, help_text = METRICS.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name in sorted(self._counters):
+                header(name, "counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                header(name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    for bound, total in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {total}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        collected: Dict[str, List[Tuple[LabelKey, float]]] = {}
+        for name, labels, value in self._collect():
+            collected.setdefault(name, []).append((_label_key(labels), value))
+        for name in sorted(collected):
+            header(name, "gauge")
+            for key, value in sorted(collected[name]):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Atomically write the text exposition to `path` (e.g. for the node_exporter textfile collector).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve GET /metrics from a daemon thread; call shutdown() on the result to stop.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def _collect(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception:
+                continue
+        return samples
+
+
+class Tracer:
+    """
+    Collects OpenTelemetry-style spans (trace_id, span_id, parent_span_id,
+    start/end times, attributes, status) and assembles one tree per workflow
+    run. Finished trees are kept in `traces` and passed to `on_trace`.
+    """
+
+    def __init__(self, max_traces: int = 100, on_trace: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.traces: deque = deque(maxlen=max_traces)
+        self.on_trace = on_trace
+        self._lock = threading.Lock()
+        self._open: Dict[str, List[Dict[str, Any]]] = {}  # trace_id -> spans of runs still in flight
+
+    def start_span(
+        self,
+        name: str,
+        kind: str,
+        parent: Optional[Dict[str, Any]] = None,
+        span_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        span = {
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id": span_id or uuid.uuid4().hex[:16],
+            "parent_span_id": parent["span_id"] if parent else None,
+            "name": name,
+            "kind": kind,
+            "start_time": time.time(),
+            "end_time": None,
+            "status": "unset",
+            "attributes": dict(attributes or {}),
+        }
+        with self._lock:
+            self._open.setdefault(span["trace_id"], []).append(span)
+        return span
+
+    def end_span(self, span: Dict[str, Any], status: str = "ok", **attributes: Any) -> None:
+        span["end_time"] = time.time()
+        span["status"] = status
+        span["attributes"].update(attributes)
+        if span["parent_span_id"] is not None:
+            return
+        with self._lock:
+            spans = self._open.pop(span["trace_id"], [])
+        tree = self._build_tree(spans)
+        self.traces.append(tree)
+        if self.on_trace is not None:
+            self.on_trace(tree)
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any):
+        """
+        Child span of the current one (if any) for the duration of the block.
+        """
+        span = self.start_span(name, kind, parent=_current_span.get(), attributes=attributes)
+        token = _current_span.set(span)
+        status = "ok"
+        try:
+            yield span
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, status)
+
+    @staticmethod
+    def _build_tree(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        by_id = {span["span_id"]: {**span, "children": []} for span in spans}
+        root = None
+        for span in sorted(by_id.values(), key=lambda s: s["start_time"]):
+            if span["end_time"] is not None:
+                span["duration_ms"] = round((span["end_time"] - span["start_time"]) * 1000, 3)
+            parent = by_id.get(span["parent_span_id"]) if span["parent_span_id"] else None
+            if parent is not None:
+                parent["children"].append(span)
+            elif root is None:
+                root = span
+        return root or {}
+
+
+class Telemetry:
+    """
+    Metrics registry plus optional tracer, shared by the workflow's graph
+    callbacks and FirecrawlService.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, tracer: Optional[Tracer] = None):
+        self.registry = registry or MetricsRegistry()
+        self.tracer = tracer
+
+    @contextmanager
+    def external_call(self, service: str, operation: str, **attributes: Any):
+        """
+        Time an outbound API call and count it by outcome.
+        """
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start_span(
+                f"{service}.{operation}", "client",
+                parent=_current_span.get(),
+                attributes=attributes
+            )
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.registry.observe(
+                "research_external_call_duration_seconds", time.perf_counter() - start,
+                service=service, operation=operation
+            )
+            self.registry.inc("research_external_calls_total", service=service, operation=operation, status=status)
+            if span is not None:
+                self.tracer.end_span(span, status)
+
+    def watch_cache(self, name: str, cache: Any) -> None:
+        """
+        Export hit/miss counts and size of any cache exposing stats().
+        """
+        def collect() -> List[Sample]:
+            stats = cache.stats()
+            hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+            labels = {"cache": name}
+            return [
+                ("research_cache_hits_total", labels, hits),
+                ("research_cache_misses_total", labels, misses),
+                ("research_cache_entries", labels, stats.get("entries", 0)),
+                ("research_cache_hit_ratio", labels, hits / (hits + misses) if hits + misses else 0.0),
+            ]
+
+        self.registry.add_collector(collect)
+
+    def callback_handler(self) -> "MetricsCallbackHandler":
+        return MetricsCallbackHandler(self)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback that times LangGraph nodes and chat model calls, and
+    counts tokens and estimated cost from the response usage metadata.
+    Responses replayed from the LLM cache (marked `cached` in generation_info)
+    are counted but not billed.
+    """
+
+    run_inline = True  # Plain dict bookkeeping; no need for an executor hop
+
+    def __init__(self, telemetry: Telemetry):
+        self.telemetry = telemetry
+        self.registry = telemetry.registry
+        self.tracer = telemetry.tracer
+        self._runs: Dict[Any, Dict[str, Any]] = {}
+        self._parents: Dict[Any, Any] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or ""
+        self._parents[run_id] = parent_run_id
+        if parent_run_id is None:
+            kind, attributes = "graph", {"run_id": metadata.get("thread_id")}
+        elif name and name == metadata.get("langgraph_node"):
+            kind, attributes = "node", {}
+        else:
+            return
+        run = {"name": name, "kind": kind, "start": time.perf_counter()}
+        if self.tracer is not None:
+            run["span"] = self.tracer.start_span(
+                name or "workflow", kind,
+                parent=self._parent_span(parent_run_id),
+                attributes=attributes
+            )
+            if kind == "node":
+                # Firecrawl calls made inside the node nest under its span
+                _current_span.set(run["span"])
+        self._runs[run_id] = run
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish_chain(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish_chain(run_id, "error")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        self._parents[run_id] = parent_run_id
+        run = {
+            "kind": "llm",
+            "node": metadata.get("langgraph_node", ""),
+            "model": metadata.get("ls_model_name", ""),
+            "start": time.perf_counter(),
+        }
+        if self.tracer is not None:
+            run["span"] = self.tracer.start_span(
+                f"llm.{run['model'] or 'chat'}", "client",
+                parent=self._parent_span(parent_run_id),
+                attributes={"node": run["node"]}
+            )
+        self._runs[run_id] = run
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._parents.pop(run_id, None)
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        elapsed = time.perf_counter() - run["start"]
+        model = (response.llm_output or {}).get("model_name") or run["model"] or "unknown"
+        generations = [g for batch in response.generations for g in batch]
+        cached = bool(generations) and all((g.generation_info or {}).get("cached") for g in generations)
+        prompt_tokens = completion_tokens = 0
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += usage.get("input_tokens", 0)
+            completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+
+        labels = {"service": "openai", "operation": run["node"] or "chat", "model": model}
+        self.registry.inc("research_external_calls_total", status="cached" if cached else "ok", **labels)
+        cost = 0.0
+        if not cached:
+            self.registry.observe("research_external_call_duration_seconds", elapsed, **labels)
+            self.registry.inc("research_llm_tokens_total", prompt_tokens, model=model, node=run["node"], type="prompt")
+            self.registry.inc("research_llm_tokens_total", completion_tokens, model=model, node=run["node"], type="completion")
+            price = model_price(model)
+            if price is not None:
+                cost = (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+                self.registry.inc("research_llm_cost_usd_total", cost, model=model, node=run["node"])
+        if "span" in run:
+            self.tracer.end_span(
+                run["span"], "ok",
+                model=model, cached=cached,
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                cost_usd=round(cost, 6)
+            )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._parents.pop(run_id, None)
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        labels = {"service": "openai", "operation": run["node"] or "chat", "model": run["model"] or "unknown"}
+        self.registry.observe("research_external_call_duration_seconds", time.perf_counter() - run["start"], **labels)
+        self.registry.inc("research_external_calls_total", status="error", **labels)
+        if "span" in run:
+            self.tracer.end_span(run["span"], "error", error=str(error))
+
+    def _finish_chain(self, run_id, status: str) -> None:
+        self._parents.pop(run_id, None)
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        if run["kind"] == "node":
+            self.registry.observe("research_node_duration_seconds", time.perf_counter() - run["start"], node=run["name"])
+            if status == "error":
+                self.registry.inc("research_node_errors_total", node=run["name"])
+        if "span" in run:
+            self.tracer.end_span(run["span"], status)
+
+    def _parent_span(self, parent_run_id) -> Optional[Dict[str, Any]]:
+        # Nearest ancestor run that has a span (intermediate runnables are not traced)
+        while parent_run_id is not None:
+            run = self._runs.get(parent_run_id)
+            if run is not None and "span" in run:
+                return run["span"]
+            parent_run_id = self._parents.get(parent_run_id)
+        return None
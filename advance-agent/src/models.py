@@ -16,6 +16,11 @@ class ResearchAdvancement(BaseModel):
     date: Optional[str] = None  # Publication date or year
 
 
+# Several advancements extracted in one structured call
+class ResearchAdvancementBatch(BaseModel):
+    advancements: List[ResearchAdvancement]  # One entry per requested title, in request order
+
+
 # Represents the overall output for a query
 class ResearchDiscoveryOutput(BaseModel):
     field: str  # e.g., "Computer Science"
@@ -23,15 +28,25 @@ class ResearchDiscoveryOutput(BaseModel):
     advancements: List[ResearchAdvancement]  # List of recent advancements
     synthesis: str  # Synthesis paragraph summarizing trends and future directions
     search_time: Optional[str] = None  # Timestamp or duration of the search
+    new_sources: Optional[int] = None  # Watch mode: sources not seen (or changed) since earlier sweeps
+    from_index: bool = False  # Answered from the results index without searching
 
 
 # State object for LangGraph workflow
 class ResearchDiscoveryState(BaseModel):
     query: str  # "Field -> Subtopic"
-    search_results: List[Dict[str, Any]] = []  # Raw search results from Firecrawl
+    run_id: Optional[str] = None  # Checkpoint thread ID; also owns this run's content store entries
+    search_results: List[Dict[str, Any]] = []  # Compact search results; full markdown and raw payloads live in the content store
     advancement_titles: List[Dict[str, str]] = []  # List of titles and main links for advancements.
     advancements: List[ResearchAdvancement] = []  # Structured advancements
+    failed_titles: List[Dict[str, str]] = []  # Titles whose detail extraction failed, kept for retries
+    extracted_titles: List[str] = []  # Title keys of advancements the LLM extracted this run (the rest were reused)
+    deep_pages: Dict[str, str] = {}  # Deep scrape: normalized main link -> content store ID of the full page
+    details_extracted: bool = False  # Pipelined mode: details were extracted while the titles streamed
     synthesis: Optional[str] = None  # Synthesis paragraph
     output: Optional[ResearchDiscoveryOutput] = None  # Final structured output
     error_logs: List[str] = []  # Errors or warnings encountered during workflow
-    progress: Optional[str] = None  # Status or progress indicator
\ No newline at end of file
+    progress: Optional[str] = None  # Status or progress indicator
+    incremental: bool = False  # Watch mode: only sources not seen in earlier sweeps are extracted
+    previous_advancements: List[ResearchAdvancement] = []  # Watch mode: merged results stored by earlier sweeps
+    previous_synthesis: Optional[str] = None  # Watch mode: synthesis stored by the last sweep
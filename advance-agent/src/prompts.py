@@ -53,6 +53,32 @@ Instructions:
     * date: Year or full date of publication (YYYY or YYYY-MM-DD).
 - If a field is not available, use null or an empty list as appropriate.
 - Return the result as object matching the ResearchAdvancement model.
+"""
+
+    # STEP 2 (batched): SYSTEM prompt for extracting details for several advancements in one call
+    ADVANCEMENT_DETAIL_BATCH_SYSTEM = """
+You are an expert academic research assistant. Given several recent advancements, each with a title and its own content, extract all relevant details for every advancement as defined in the ResearchAdvancement Pydantic model. Use only the content given for each advancement. Focus on accuracy and completeness.
+"""
+
+    @staticmethod
+    def advancement_detail_batch_user(items: list) -> str:
+        sections = "\n\n".join(
+            f"""### Advancement {i}
+Advancement Title: {title}
+Content:
+{content}"""
+            for i, (title, content) in enumerate(items, 1)
+        )
+        return f"""
+{sections}
+
+Instructions:
+- Return exactly {len(items)} ResearchAdvancement objects in the "advancements" list, one per advancement above and in the same order.
+- Copy each "Advancement Title" exactly into the title field unless the content gives a fuller official title.
+- For each, extract every field of the ResearchAdvancement model:
+    * title, summary (2-4 sentences), authors, keywords, impact_statement (1-2 sentences), language,
+      paper_links, blog_links, pdf_links, code_links, date (YYYY or YYYY-MM-DD).
+- If a field is not available, use null or an empty list as appropriate.
 """
 
     # SYSTEM prompt for synthesizing trends and future directions
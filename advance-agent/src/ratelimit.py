@@ -0,0 +1,305 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+import httpx
+import openai
+from langchain_core.rate_limiters import BaseRateLimiter
+from .metrics import Telemetry
+
+T = TypeVar("T")
+
+# Lower runs first: a synthesis call waiting on the OpenAI quota goes ahead of
+# queued detail extractions, so a finishing run is not starved by new ones
+PRIORITY_SYNTHESIS = 0
+PRIORITY_TITLES = 1
+PRIORITY_DEFAULT = 1
+PRIORITY_DETAILS = 2
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# How often a queued caller that is not at the head checks for its turn
+QUEUE_POLL_SECONDS = 0.05
+
+# Token estimate and priority of the model request being made in this context
+_model_request: contextvars.ContextVar[Tuple[float, int]] = contextvars.ContextVar(
+    "model_request", default=(0, PRIORITY_DEFAULT)
+)
+
+
+def _status_and_headers(exc: BaseException) -> Tuple[Optional[int], Any]:
+    # openai.APIStatusError and httpx.HTTPStatusError both carry the HTTP response
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    return status, getattr(response, "headers", None) or {}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Rate limits, server errors, timeouts and dropped connections are worth
+    retrying; anything else (bad request, auth, parsing) is not.
+    """
+    status, _ = _status_and_headers(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, openai.APIConnectionError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Delay requested by the server via Retry-After (seconds or HTTP date) or
+    OpenAI's retry-after-ms, if any.
+    """
+    _, headers = _status_and_headers(exc)
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(float(value) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """
+    Continuously refilling allowance of `per_minute` units, holding at most
+    `capacity` (one minute's worth by default).
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available (0 if they are now).
+        Requests larger than the capacity only wait for a full bucket.
+        """
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class ProviderLimiter:
+    """
+    Request and token budgets for one provider, handed out in priority order:
+    callers queue by (priority, arrival) and only the head of the queue may
+    take from the buckets. `pause()` holds the whole queue, e.g. after the
+    provider answered 429 with a Retry-After.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._queue: List[Tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self._paused_until = 0.0
+        # Guards the queue and buckets; a limiter may be shared by several event loops
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens: float = 0, priority: int = PRIORITY_DEFAULT) -> float:
+        """
+        Wait for a request slot and `tokens` tokens; returns the seconds waited.
+        """
+        start = time.monotonic()
+        with self._lock:
+            if not self._queue and self._try_take(tokens) == 0:
+                return 0.0
+            ticket = (priority, next(self._arrivals))
+            heapq.heappush(self._queue, ticket)
+        try:
+            while True:
+                with self._lock:
+                    if self._queue[0] == ticket:
+                        delay = self._try_take(tokens)
+                        if delay == 0:
+                            heapq.heappop(self._queue)
+                            return time.monotonic() - start
+                    else:
+                        delay = QUEUE_POLL_SECONDS
+                # Re-check at least every poll interval in case a higher priority caller arrives
+                await asyncio.sleep(min(delay, QUEUE_POLL_SECONDS * 10))
+        except BaseException:
+            with self._lock:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+            raise
+
+    def try_acquire(self, tokens: float = 0) -> float:
+        """
+        Take a request slot and `tokens` tokens if nobody is queued and both
+        are available now; otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            if self._queue:
+                return QUEUE_POLL_SECONDS
+            return self._try_take(tokens)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _try_take(self, tokens: float) -> float:
+        # Caller holds the lock; takes from both buckets only if both have room
+        delay = self._paused_until - time.monotonic()
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        if delay > 0:
+            return delay
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens)
+        return 0.0
+
+
+class ModelRateLimiter(BaseRateLimiter):
+    """
+    A ProviderLimiter as a chat model's `rate_limiter`. LangChain acquires it
+    only when the LLM cache misses, so cached completions are neither paced
+    nor charged. Token estimates and priorities come from `request()`.
+    """
+
+    def __init__(self, limiter: ProviderLimiter, provider: str = "openai", telemetry: Optional[Telemetry] = None):
+        self.limiter = limiter
+        self.provider = provider
+        self.telemetry = telemetry
+
+    @staticmethod
+    @contextlib.contextmanager
+    def request(tokens: float = 0, priority: int = PRIORITY_DEFAULT) -> Iterator[None]:
+        """
+        Charge model calls made inside the block `tokens` tokens, queued at `priority`.
+        """
+        token = _model_request.set((tokens, priority))
+        try:
+            yield
+        finally:
+            _model_request.reset(token)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        tokens, _ = _model_request.get()
+        start = time.monotonic()
+        while True:
+            delay = self.limiter.try_acquire(tokens)
+            if delay == 0:
+                self._observe(time.monotonic() - start)
+                return True
+            if not blocking:
+                return False
+            time.sleep(min(delay, QUEUE_POLL_SECONDS * 10))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        tokens, priority = _model_request.get()
+        if not blocking:
+            return self.limiter.try_acquire(tokens) == 0
+        self._observe(await self.limiter.acquire(tokens, priority))
+        return True
+
+    def _observe(self, waited: float) -> None:
+        if self.telemetry is not None:
+            self.telemetry.registry.observe("research_rate_limit_wait_seconds", waited, service=self.provider)
+
+
+class RateLimitScheduler:
+    """
+    Runs provider calls through per-provider limiters and retries failures
+    that are worth retrying with jittered exponential backoff. A Retry-After
+    from the provider replaces the computed backoff and pauses that
+    provider's queue, so concurrent callers back off together.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 60.0,
+        telemetry: Optional[Telemetry] = None
+    ):
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.telemetry = telemetry
+        self.limiters: Dict[str, ProviderLimiter] = {}
+        self.logger = logging.getLogger("RateLimitScheduler")
+
+    def configure(
+        self,
+        provider: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ) -> ProviderLimiter:
+        self.limiters[provider] = ProviderLimiter(requests_per_minute, tokens_per_minute)
+        return self.limiters[provider]
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        # Unconfigured providers are not paced but still share pauses and retries
+        return self.limiters.get(provider) or self.configure(provider)
+
+    async def run(
+        self,
+        provider: str,
+        call: Callable[[], Awaitable[T]],
+        tokens: float = 0,
+        priority: int = PRIORITY_DEFAULT,
+        pace: bool = True
+    ) -> T:
+        """
+        Await `call()` once the provider's budget allows, retrying retryable
+        failures up to `max_retries` times. The last error is re-raised.
+        With `pace=False` the call acquires the budget itself (e.g. through a
+        ModelRateLimiter) and only the retries happen here.
+        """
+        limiter = self.limiter(provider)
+        for attempt in itertools.count():
+            if pace:
+                waited = await limiter.acquire(tokens, priority)
+                if self.telemetry is not None:
+                    self.telemetry.registry.observe("research_rate_limit_wait_seconds", waited, service=provider)
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    # Small jitter on top keeps callers released together from colliding again
+                    delay = retry_after + random.uniform(0, self.backoff_base_seconds)
+                    limiter.pause(delay)
+                else:
+                    delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+                if self.telemetry is not None:
+                    self.telemetry.registry.inc("research_rate_limit_retries_total", service=provider)
+                self.logger.warning(
+                    f"{provider} call failed ({e!r}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
@@ -0,0 +1,311 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Collection, Dict, List, Optional, Tuple
+from .matching import tokenize
+from .models import ResearchAdvancement
+from .utils import normalize_query, normalize_url
+
+LINK_FIELDS = ("paper_links", "blog_links", "pdf_links", "code_links")
+ARXIV_ID = re.compile(r"arxiv\.org/(?:abs|pdf)/([^/?#]+?)(?:v\d+)?(?:\.pdf)?$")
+
+
+def paper_key(url: str) -> str:
+    """
+    Identity of a paper link across runs: arXiv abs/pdf links of any version
+    collapse to one key, anything else to its normalized URL.
+    """
+    url = normalize_url(url)
+    match = ARXIV_ID.search(url)
+    return f"arxiv:{match.group(1)}" if match else url
+
+
+def title_key(title: str) -> str:
+    return " ".join(str(title or "").lower().split())
+
+
+class ResultsIndex:
+    """
+    SQLite store of every extracted ResearchAdvancement, with an FTS5 index
+    over titles, summaries, keywords, authors, topics, dates and links.
+    Advancements are deduped across runs by their normalized paper/PDF links,
+    then by title, and remember every "Field -> Subtopic" query that found
+    them. The latest synthesis per query is kept alongside. Freshness is
+    measured from when an advancement's details were last extracted, so
+    reusing a stored entry does not make it any younger.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS advancements (
+                id INTEGER PRIMARY KEY,
+                title_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                extracted_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS advancements_title_key ON advancements (title_key);
+            CREATE TABLE IF NOT EXISTS advancement_links (
+                paper_key TEXT PRIMARY KEY,
+                advancement_id INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS advancement_queries (
+                advancement_id INTEGER NOT NULL,
+                query_key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                subtopic TEXT NOT NULL,
+                run_id TEXT,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (advancement_id, query_key)
+            );
+            CREATE INDEX IF NOT EXISTS advancement_queries_query ON advancement_queries (query_key, last_seen);
+            CREATE TABLE IF NOT EXISTS syntheses (
+                query_key TEXT PRIMARY KEY,
+                synthesis TEXT NOT NULL,
+                run_id TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS advancements_fts USING fts5(
+                title, summary, keywords, authors, topics, date, links
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(advancements)")}
+        if "extracted_at" not in columns:
+            # Indexes written before extraction times were kept: last_seen is the best estimate
+            self._conn.execute("ALTER TABLE advancements ADD COLUMN extracted_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE advancements SET extracted_at = last_seen")
+        self._conn.commit()
+
+    def record(
+        self,
+        query: str,
+        advancements: List[ResearchAdvancement],
+        synthesis: Optional[str] = None,
+        run_id: Optional[str] = None,
+        extracted: Optional[Collection[str]] = None
+    ) -> int:
+        """
+        Upsert a run's advancements (and synthesis) for a "Field -> Subtopic"
+        query. A re-extracted advancement replaces the stored one, keeping the
+        union of both link lists and any field only the stored one has.
+        `extracted` holds the title keys the run actually sent to the LLM
+        (None: all of them); the others were reused, so only their query
+        association is recorded and their stored details keep their age.
+        Returns the number of new advancements.
+        """
+        field, subtopic = [part.strip() for part in (query.split('->') + [''])[:2]]
+        key = normalize_query(query)
+        now = time.time()
+        added = 0
+        with self._lock:
+            with self._conn:
+                for adv in advancements:
+                    fresh = extracted is None or title_key(adv.title) in extracted
+                    advancement_id, is_new = self._upsert(adv, now, fresh)
+                    added += is_new
+                    self._conn.execute(
+                        """
+                        INSERT INTO advancement_queries (advancement_id, query_key, field, subtopic, run_id, last_seen)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (advancement_id, query_key) DO UPDATE SET
+                            run_id = excluded.run_id, last_seen = excluded.last_seen
+                        """,
+                        (advancement_id, key, field, subtopic, run_id, now)
+                    )
+                    self._reindex(advancement_id)
+                if synthesis:
+                    self._conn.execute(
+                        """
+                        INSERT INTO syntheses (query_key, synthesis, run_id, updated_at) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (query_key) DO UPDATE SET
+                            synthesis = excluded.synthesis, run_id = excluded.run_id, updated_at = excluded.updated_at
+                        """,
+                        (key, synthesis, run_id, now)
+                    )
+        return added
+
+    def find(self, title: str, main_link: str = "", max_age_seconds: Optional[float] = None) -> Optional[ResearchAdvancement]:
+        """
+        The stored advancement for a title: matched by its main link's paper
+        key first, then by exact normalized title. None if unknown, or if it
+        was extracted more than `max_age_seconds` ago.
+        """
+        cutoff = time.time() - max_age_seconds if max_age_seconds is not None else 0.0
+        with self._lock:
+            row = None
+            if main_link:
+                row = self._conn.execute(
+                    """
+                    SELECT a.data FROM advancement_links l JOIN advancements a ON a.id = l.advancement_id
+                    WHERE l.paper_key = ? AND a.extracted_at >= ?
+                    """,
+                    (paper_key(main_link), cutoff)
+                ).fetchone()
+            if row is None and title_key(title):
+                row = self._conn.execute(
+                    "SELECT data FROM advancements WHERE title_key = ? AND extracted_at >= ? ORDER BY extracted_at DESC LIMIT 1",
+                    (title_key(title), cutoff)
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return ResearchAdvancement.model_validate_json(row[0]) if row else None
+
+    def lookup(
+        self,
+        query: str,
+        max_age_seconds: Optional[float] = None,
+        limit: int = 50
+    ) -> Tuple[List[ResearchAdvancement], Optional[str]]:
+        """
+        Advancements recorded for a query (most recently seen first) and its
+        latest synthesis, limited to those extracted (and a synthesis written)
+        within `max_age_seconds`.
+        """
+        key = normalize_query(query)
+        cutoff = time.time() - max_age_seconds if max_age_seconds is not None else 0.0
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT a.data FROM advancement_queries q JOIN advancements a ON a.id = q.advancement_id
+                WHERE q.query_key = ? AND a.extracted_at >= ?
+                ORDER BY q.last_seen DESC, a.id LIMIT ?
+                """,
+                (key, cutoff, limit)
+            ).fetchall()
+            synthesis = self._conn.execute(
+                "SELECT synthesis FROM syntheses WHERE query_key = ? AND updated_at >= ?", (key, cutoff)
+            ).fetchone()
+        return [ResearchAdvancement.model_validate_json(row[0]) for row in rows], synthesis[0] if synthesis else None
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Full-text search, best match first (BM25). Any term may match; each
+        hit carries the advancement and the queries that found it.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT a.id, a.data, bm25(advancements_fts) AS score
+                FROM advancements_fts JOIN advancements a ON a.id = advancements_fts.rowid
+                WHERE advancements_fts MATCH ? ORDER BY score LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+            hits = []
+            for advancement_id, data, score in rows:
+                topics = self._conn.execute(
+                    "SELECT field, subtopic FROM advancement_queries WHERE advancement_id = ? ORDER BY last_seen DESC",
+                    (advancement_id,)
+                ).fetchall()
+                hits.append({
+                    "advancement": ResearchAdvancement.model_validate_json(data),
+                    "queries": [f"{field} -> {subtopic}" for field, subtopic in topics],
+                    "score": -score
+                })
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Indexed advancements and queries, plus find() hits and misses since start.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM advancements").fetchone()[0]
+            queries = self._conn.execute("SELECT COUNT(DISTINCT query_key) FROM advancement_queries").fetchone()[0]
+        return {"entries": entries, "queries": queries, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _upsert(self, adv: ResearchAdvancement, now: float, fresh: bool = True) -> Tuple[int, bool]:
+        # Caller holds the lock and an open transaction
+        keys = [paper_key(link) for link in [*adv.paper_links, *adv.pdf_links] if link]
+        row = None
+        for key in keys:
+            row = self._conn.execute(
+                "SELECT a.id, a.data FROM advancement_links l JOIN advancements a ON a.id = l.advancement_id WHERE l.paper_key = ?",
+                (key,)
+            ).fetchone()
+            if row:
+                break
+        if row is None and not keys:
+            # Without paper links, only an identical title marks the same advancement
+            row = self._conn.execute(
+                "SELECT id, data FROM advancements WHERE title_key = ? ORDER BY last_seen DESC LIMIT 1",
+                (title_key(adv.title),)
+            ).fetchone()
+
+        if row is None:
+            cursor = self._conn.execute(
+                "INSERT INTO advancements (title_key, data, first_seen, last_seen, extracted_at) VALUES (?, ?, ?, ?, ?)",
+                (title_key(adv.title), adv.model_dump_json(), now, now, now)
+            )
+            advancement_id, is_new = cursor.lastrowid, True
+        elif not fresh:
+            # A reused advancement: the stored details (and their age) stay as they are
+            self._conn.execute("UPDATE advancements SET last_seen = ? WHERE id = ?", (now, row[0]))
+            return row[0], False
+        else:
+            advancement_id, is_new = row[0], False
+            stored = ResearchAdvancement.model_validate_json(row[1])
+            # The new extraction wins, but fields it left empty keep their stored values
+            update = {field: value for field, value in stored if not getattr(adv, field)}
+            update.update({
+                field: list(dict.fromkeys([*getattr(adv, field), *getattr(stored, field)]))
+                for field in LINK_FIELDS
+            })
+            merged = adv.model_copy(update=update)
+            self._conn.execute(
+                "UPDATE advancements SET title_key = ?, data = ?, last_seen = ?, extracted_at = ? WHERE id = ?",
+                (title_key(merged.title), merged.model_dump_json(), now, now, advancement_id)
+            )
+            adv = merged
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO advancement_links (paper_key, advancement_id) VALUES (?, ?)",
+            [(key, advancement_id) for key in {paper_key(link) for link in [*adv.paper_links, *adv.pdf_links] if link}]
+        )
+        return advancement_id, is_new
+
+    def _reindex(self, advancement_id: int) -> None:
+        # Caller holds the lock and an open transaction
+        data = self._conn.execute("SELECT data FROM advancements WHERE id = ?", (advancement_id,)).fetchone()[0]
+        adv = ResearchAdvancement.model_validate_json(data)
+        topics = self._conn.execute(
+            "SELECT field, subtopic FROM advancement_queries WHERE advancement_id = ?", (advancement_id,)
+        ).fetchall()
+        links = [link for field in LINK_FIELDS for link in getattr(adv, field)]
+        self._conn.execute("DELETE FROM advancements_fts WHERE rowid = ?", (advancement_id,))
+        self._conn.execute(
+            """
+            INSERT INTO advancements_fts (rowid, title, summary, keywords, authors, topics, date, links)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                advancement_id,
+                adv.title,
+                " ".join(filter(None, [adv.summary, adv.impact_statement])),
+                " ".join(adv.keywords),
+                " ".join(adv.authors),
+                " ".join(f"{field} {subtopic}" for field, subtopic in topics),
+                adv.date or "",
+                " ".join(links)
+            )
+        )
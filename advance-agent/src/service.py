@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from .models import ResearchAdvancement, ResearchDiscoveryState
+from .utils import normalize_query, parse_query
+from .workflow import Workflow
+
+logger = logging.getLogger("ResearchService")
+
+TERMINAL_EVENTS = {"result", "error"}
+
+
+class SharedRun:
+    """
+    One workflow execution and the events it has produced so far. Every
+    subscriber gets the full event history, then live events until the run
+    finishes, so late joiners of a coalesced run miss nothing.
+    """
+
+    def __init__(self, query: str, run_id: str):
+        self.query = query
+        self.run_id = run_id
+        self.events: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def done(self) -> bool:
+        return bool(self.events) and self.events[-1]["event"] in TERMINAL_EVENTS
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        # Snapshot and register without awaiting in between, so no event is missed or repeated
+        backlog, finished = list(self.events), self.done
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            for event in backlog:
+                yield event
+            if finished:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+
+class ResearchService:
+    """
+    Runs research requests on one warm Workflow. Requests for a query that is
+    already running (same normalized "Field -> Subtopic" and mode) join that
+    run instead of starting another. At most `max_concurrent_runs` runs
+    execute at once; the rest wait their turn. Runs finish even if every
+    client disconnects, so their results still reach the caches.
+    """
+
+    def __init__(
+        self,
+        workflow: Workflow,
+        max_concurrent_runs: int = 4,
+        on_result: Optional[Callable[[], None]] = None
+    ):
+        self.workflow = workflow
+        self.on_result = on_result
+        self._slots = asyncio.Semaphore(max(1, max_concurrent_runs))
+        self._inflight: Dict[Tuple[str, bool], SharedRun] = {}
+        self.coalesced = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def submit(self, query: str, incremental: bool = False) -> Tuple[SharedRun, bool]:
+        """
+        Start a run for a "Field -> Subtopic" query, or join the one in flight.
+        Returns the run and whether it was joined.
+        """
+        key = (normalize_query(query), incremental)
+        run = self._inflight.get(key)
+        if run is not None:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight run {run.run_id} for: {query}")
+            return run, True
+        run = SharedRun(query, uuid.uuid4().hex)
+        self._inflight[key] = run
+        run.task = asyncio.create_task(self._execute(key, run, incremental))
+        return run, False
+
+    async def _execute(self, key: Tuple[str, bool], run: SharedRun, incremental: bool) -> None:
+        def on_advancement(adv: ResearchAdvancement) -> None:
+            run.publish({"event": "advancement", "advancement": adv.model_dump(mode="json")})
+
+        try:
+            async with self._slots:
+                run.publish({"event": "started", "run_id": run.run_id, "query": run.query})
+                result = await self.workflow.arun(
+                    run.query,
+                    run_id=run.run_id,
+                    incremental=incremental,
+                    on_advancement=on_advancement
+                )
+            run.publish({"event": "result", **self._record(result)})
+        except Exception as e:
+            logger.error(f"Run {run.run_id} failed: {e}", exc_info=True)
+            run.publish({"event": "error", "run_id": run.run_id, "error_logs": [str(e)]})
+        finally:
+            self._inflight.pop(key, None)
+            if self.on_result:
+                self.on_result()
+
+    @staticmethod
+    def _record(result: ResearchDiscoveryState) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"query": result.query, "run_id": result.run_id}
+        if result.output:
+            record.update(result.output.model_dump(mode="json"))
+        record["error_logs"] = result.error_logs
+        return record
+
+
+def create_app(service: ResearchService) -> Starlette:
+    """
+    HTTP front end for a ResearchService:
+
+    POST /research  {"query": "Field, Subtopic"} (or "field" and "subtopic"),
+                    optional "watch" and "stream" (default true). Streams
+                    NDJSON events: accepted, started, advancement..., then
+                    result or error. With "stream": false, returns the final
+                    event as one JSON object.
+    GET  /healthz   Liveness plus in-flight and coalesced counts.
+    GET  /metrics   Prometheus text metrics, when telemetry is enabled.
+    """
+
+    async def research(request: Request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "Expected a JSON object body"}, status_code=400)
+        if not isinstance(body, dict):
+            return JSONResponse({"error": "Expected a JSON object body"}, status_code=400)
+        if body.get("field") and body.get("subtopic"):
+            parsed = (str(body["field"]).strip(), str(body["subtopic"]).strip())
+        else:
+            parsed = parse_query(str(body.get("query", "")))
+        if parsed is None or not all(parsed):
+            return JSONResponse({"error": "Expected format: Field, Subtopic"}, status_code=400)
+
+        query = f"{parsed[0]} -> {parsed[1]}"
+        run, coalesced = service.submit(query, incremental=bool(body.get("watch")))
+        accepted = {"event": "accepted", "query": query, "run_id": run.run_id, "coalesced": coalesced}
+
+        if body.get("stream", True):
+            async def ndjson():
+                yield json.dumps(accepted) + "\n"
+                async for event in run.subscribe():
+                    yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        final = accepted
+        async for event in run.subscribe():
+            final = event
+        final = {**final, "coalesced": coalesced}
+        return JSONResponse(final, status_code=200 if final["event"] == "result" else 500)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok", "inflight": service.inflight, "coalesced": service.coalesced})
+
+    async def metrics(request: Request):
+        telemetry = service.workflow.telemetry
+        if telemetry is None:
+            return PlainTextResponse("metrics disabled\n", status_code=404)
+        return PlainTextResponse(telemetry.registry.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/research", research, methods=["POST"]),
+        Route("/healthz", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ])
+
+
+async def serve(
+    workflow: Workflow,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    max_concurrent_runs: int = 4,
+    on_result: Optional[Callable[[], None]] = None
+) -> None:
+    """
+    Serve research requests over HTTP on the running event loop until interrupted.
+    """
+    service = ResearchService(workflow, max_concurrent_runs=max_concurrent_runs, on_result=on_result)
+    server = uvicorn.Server(uvicorn.Config(create_app(service), host=host, port=port, log_level="info"))
+    await server.serve()
@@ -0,0 +1,40 @@
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a "Field -> Subtopic" query: lowercased, single-spaced.
+    """
+    parts = [re.sub(r"\s+", " ", part).strip().lower() for part in query.split("->")]
+    return " -> ".join(parts)
+
+
+def parse_query(query: str):
+    """
+    Split a "Field, Subtopic" query into its parts, or return None if malformed.
+    """
+    if ',' not in query or len(query.split(',')) != 2:
+        return None
+    field, subtopic = [x.strip() for x in query.split(',', 1)]
+    if not field or not subtopic:
+        return None
+    return field, subtopic
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for lookups: https scheme, lowercased host without
+    "www.", no fragment and no trailing slash.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    return urlunsplit(("https", host, path, parts.query, ""))
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .models import ResearchAdvancement
+from .utils import normalize_query, normalize_url
+
+
+class WatchStore:
+    """
+    SQLite record of what watch mode has already processed for each query:
+    the sources seen (normalized URL and content hash) and the merged
+    advancements and synthesis from the last successful sweep.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_sources (
+                query_key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (query_key, url)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                query_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                advancements TEXT NOT NULL,
+                synthesis TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def seen(self, query: str) -> Dict[str, str]:
+        """
+        Content hash of every source already processed for the query, by normalized URL.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, content_hash FROM seen_sources WHERE query_key = ?", (normalize_query(query),)
+            ).fetchall()
+        return dict(rows)
+
+    def load_results(self, query: str) -> Tuple[List[ResearchAdvancement], Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT advancements, synthesis FROM results WHERE query_key = ?", (normalize_query(query),)
+            ).fetchone()
+        if row is None:
+            return [], None
+        return [ResearchAdvancement.model_validate(item) for item in json.loads(row[0])], row[1]
+
+    def record(
+        self,
+        query: str,
+        sources: List[Dict[str, Any]],
+        advancements: List[ResearchAdvancement],
+        synthesis: Optional[str]
+    ) -> None:
+        """
+        Mark sources as processed and replace the stored results, in one transaction.
+        """
+        key = normalize_query(query)
+        now = time.time()
+        rows = [
+            (key, normalize_url(src['url']), src.get('content_id') or '', now, now)
+            for src in sources if src.get('url')
+        ]
+        payload = json.dumps([adv.model_dump(mode="json") for adv in advancements], ensure_ascii=False)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    INSERT INTO seen_sources (query_key, url, content_hash, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (query_key, url) DO UPDATE SET
+                        content_hash = excluded.content_hash, last_seen = excluded.last_seen
+                    """,
+                    rows
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO results (query_key, query, advancements, synthesis, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (query_key) DO UPDATE SET
+                        query = excluded.query, advancements = excluded.advancements,
+                        synthesis = excluded.synthesis, updated_at = excluded.updated_at
+                    """,
+                    (key, query, payload, synthesis, now)
+                )
+
+    def forget(self, query: str) -> None:
+        """
+        Drop a query's seen sources and stored results, so its next sweep starts over.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM seen_sources WHERE query_key = ?", (key,))
+                self._conn.execute("DELETE FROM results WHERE query_key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,14 +1,82 @@
-from typing import Dict, List
+import asyncio
+import json
+import uuid
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import aiosqlite
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ValidationError
+from .cache import DiskCache, MemoryCache
+from .config import WorkflowConfig
+from .content_store import DiskContentStore, MemoryContentStore
+from .context import ContextPacker
 from .firecrawl import FirecrawlService
+from .llm_cache import ResearchLLMCache
+from .matching import SourceIndex, tokenize
+from .metrics import Telemetry, Tracer
+from .ratelimit import PRIORITY_DETAILS, PRIORITY_SYNTHESIS, PRIORITY_TITLES, ModelRateLimiter, RateLimitScheduler
 from .prompts import ResearchDiscoveryPrompts
-from .models import ResearchDiscoveryState, ResearchAdvancement, ResearchDiscoveryOutput
+from .results_index import ResultsIndex
+from .utils import normalize_url
+from .watch import WatchStore
+from .models import ResearchDiscoveryState, ResearchAdvancement, ResearchAdvancementBatch, ResearchDiscoveryOutput
 import logging
+import os
+import time
+
+
+class _LineStreamHandler(AsyncCallbackHandler):
+    """
+    Hands each complete line of a streamed chat completion to `on_line`.
+    """
+
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self._buffer = ""
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        # A retried call streams from the beginning again
+        self._buffer = ""
+
+    async def on_llm_new_token(self, token: str, **kwargs):
+        self._buffer += token
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self.on_line(line)
+
 
 class Workflow:
-    def __init__(self):
+    """
+    Research discovery pipeline. `firecrawl` and `llm` default to the live
+    Firecrawl and OpenAI backends; pass stand-ins (see src/fakes.py) to run
+    offline. Each LLM step uses the model named for it in the config; `models`
+    maps model names to chat models that replace those OpenAI clients, and
+    `llm` stands in for any model not in `models`. `callbacks` are attached
+    to every graph invocation.
+    """
+
+    def __init__(
+        self,
+        config: Optional[WorkflowConfig] = None,
+        firecrawl: Optional[FirecrawlService] = None,
+        llm: Optional[BaseChatModel] = None,
+        callbacks: Optional[List[BaseCallbackHandler]] = None,
+        models: Optional[Dict[str, BaseChatModel]] = None
+    ):
+        self.config = config or WorkflowConfig()
+        self.callbacks = list(callbacks or [])
+
         self.logger = logging.getLogger("ResearchWorkflow")
         self.logger.setLevel(logging.DEBUG)
         if not self.logger.handlers:
@@ -22,105 +90,909 @@ class Workflow:
             self.logger.addHandler(console_handler)
         self.logger.propagate = False
 
-        self.firecrawl = FirecrawlService()
-        self.logger.info("FirecrawlService initialized.")
+        self.telemetry = None
+        if self.config.metrics_enabled:
+            tracer = Tracer(max_traces=self.config.trace_history) if self.config.tracing_enabled else None
+            self.telemetry = Telemetry(tracer=tracer)
+            self.callbacks.append(self.telemetry.callback_handler())
 
-        model = "gpt-4o"
-        self.llm = ChatOpenAI(
-            model=model,
-            temperature=0.1
+        # Paces and retries provider calls; the OpenAI client's own retries are off so they do not compound
+        self.scheduler = RateLimitScheduler(
+            max_retries=self.config.rate_limit_max_retries,
+            backoff_base_seconds=self.config.rate_limit_backoff_base_seconds,
+            backoff_max_seconds=self.config.rate_limit_backoff_max_seconds,
+            telemetry=self.telemetry
+        )
+        self.scheduler.configure(
+            "openai",
+            requests_per_minute=self.config.openai_requests_per_minute,
+            tokens_per_minute=self.config.openai_tokens_per_minute
         )
-        self.logger.info(f"OpenAI {model} initialized.")
+        self.scheduler.configure("firecrawl", requests_per_minute=self.config.firecrawl_requests_per_minute)
+        # Chat models take the OpenAI budget themselves, after their cache lookup, so cache hits are free
+        self.model_limiter = ModelRateLimiter(self.scheduler.limiter("openai"), "openai", self.telemetry)
 
+        if firecrawl is None:
+            firecrawl_cache = None
+            if self.config.firecrawl_cache_enabled:
+                firecrawl_cache = DiskCache(
+                    os.path.join(self.config.cache_dir, "firecrawl.sqlite"),
+                    ttl_seconds=self.config.firecrawl_cache_ttl_seconds,
+                    max_entries=self.config.firecrawl_cache_max_entries,
+                    max_bytes=self.config.firecrawl_cache_max_bytes
+                )
+            firecrawl = FirecrawlService(
+                cache=firecrawl_cache,
+                max_connections=self.config.firecrawl_max_connections,
+                timeout_seconds=self.config.firecrawl_timeout_seconds,
+                telemetry=self.telemetry,
+                scheduler=self.scheduler
+            )
+            self.logger.info("FirecrawlService initialized.")
+            if firecrawl_cache is not None and self.telemetry is not None:
+                self.telemetry.watch_cache("firecrawl", firecrawl_cache)
+        self.firecrawl = firecrawl
+
+        # Injected models bring their own caching, if any
+        self.llm_cache = self._build_llm_cache() if llm is None else None
+        if self.llm_cache is not None and self.telemetry is not None:
+            self.telemetry.watch_cache("llm", self.llm_cache)
+        self._default_llm = llm
+        self._chat_models: Dict[str, BaseChatModel] = dict(models or {})
+        # Injected models are paced like our own unless they bring their own limiter
+        for injected in [llm, *self._chat_models.values()]:
+            if injected is not None and injected.rate_limiter is None:
+                injected.rate_limiter = self.model_limiter
+
+        self.title_llm = self._chat_model(self.config.titles_model)
+        self.synthesis_llm = self._chat_model(self.config.synthesis_model)
+        details_llm = self._chat_model(self.config.details_model)
+        # Use function_calling method to avoid OpenAI schema issues
+        self.detail_llm = details_llm.with_structured_output(ResearchAdvancement, method="function_calling")
+        # Batched calls return raw dicts so each entry can be validated (and retried) on its own
+        self.detail_batch_llm = details_llm.with_structured_output(
+            convert_to_openai_tool(ResearchAdvancementBatch),
+            method="function_calling"
+        )
+        # A step whose output fails validation or is incomplete is re-run on the
+        # escalation model, unless it already runs on it. Batched detail calls
+        # need no escalation: their unusable entries fall back to single calls.
+        escalations: Dict[str, Any] = {}
+        if self.config.escalation_model:
+            escalation_llm = self._chat_model(self.config.escalation_model)
+            if self.title_llm is not escalation_llm:
+                escalations["titles"] = escalation_llm
+            if details_llm is not escalation_llm:
+                escalations["details"] = escalation_llm.with_structured_output(ResearchAdvancement, method="function_calling")
+            if self.synthesis_llm is not escalation_llm:
+                escalations["synthesis"] = escalation_llm
+        self.routes: Dict[str, Tuple[Any, Optional[Any]]] = {
+            "titles": (self.title_llm, escalations.get("titles")),
+            "details": (self.detail_llm, escalations.get("details")),
+            "synthesis": (self.synthesis_llm, escalations.get("synthesis")),
+        }
+
+        if self.config.content_store_backend == "disk":
+            self.content_store = DiskContentStore(os.path.join(self.config.cache_dir, "content.sqlite"))
+        else:
+            self.content_store = MemoryContentStore()
+
+        self.packer = ContextPacker(
+            dedupe_threshold=self.config.dedupe_threshold,
+            source_token_budget=self.config.source_token_budget
+        )
         self.prompts = ResearchDiscoveryPrompts()
         self.state_cls = ResearchDiscoveryState
+        self._watch_store: Optional[WatchStore] = None
+        self._results_index: Optional[ResultsIndex] = None
         self.workflow = self._build_workflow()
+        # Checkpointed graphs, one per event loop since the SQLite saver is loop-bound
+        self._checkpointed_graphs = weakref.WeakKeyDictionary()
+        # Per-host deep scrape slots, shared by all runs on an event loop
+        self._domain_slots = weakref.WeakKeyDictionary()
         self.logger.info("Workflow Build Complete.")
     
-    def _build_workflow(self):
+    def _chat_model(self, model: str) -> BaseChatModel:
+        """
+        The chat model for a model name, created once and shared by every step that uses it.
+        """
+        if model not in self._chat_models:
+            if self._default_llm is not None:
+                self._chat_models[model] = self._default_llm
+            else:
+                self._chat_models[model] = ChatOpenAI(
+                    model=model,
+                    temperature=0.1,
+                    cache=self.llm_cache,
+                    rate_limiter=self.model_limiter,
+                    max_retries=0,
+                    stream_usage=True
+                )
+                self.logger.info(f"OpenAI {model} initialized.")
+        return self._chat_models[model]
+
+    def _build_llm_cache(self) -> Optional[ResearchLLMCache]:
+        backend = self.config.llm_cache_backend
+        if backend == "memory":
+            store = MemoryCache(
+                ttl_seconds=self.config.llm_cache_ttl_seconds,
+                max_entries=self.config.llm_cache_max_entries
+            )
+        elif backend == "disk":
+            store = DiskCache(
+                os.path.join(self.config.cache_dir, "llm.sqlite"),
+                ttl_seconds=self.config.llm_cache_ttl_seconds,
+                max_entries=self.config.llm_cache_max_entries
+            )
+        else:
+            return None
+        self.logger.info(f"LLM response cache enabled ({backend}).")
+        return ResearchLLMCache(store, refresh=self.config.refresh_cache)
+
+    def _build_workflow(self, checkpointer: Optional[AsyncSqliteSaver] = None):
         graph = StateGraph(self.state_cls)
         graph.add_node("search_sources", self._search_sources_step)
+        graph.add_node("pack_context", self._pack_context_step)
+        graph.add_node("select_new_sources", self._select_new_sources_step)
         graph.add_node("extract_titles", self._extract_titles_step)
         graph.add_node("extract_details", self._extract_details_step)
         graph.add_node("synthesize", self._synthesize_step)
 
         graph.add_edge(START, "search_sources")
-        graph.add_edge("search_sources", "extract_titles")
-        graph.add_edge("extract_titles", "extract_details")
+        graph.add_edge("search_sources", "pack_context")
+        graph.add_edge("pack_context", "select_new_sources")
+        graph.add_conditional_edges(
+            "select_new_sources",
+            self._route_after_selection,
+            {"extract_titles": "extract_titles", END: END}
+        )
+        detail_entry = "extract_details"
+        if self.config.deep_scrape_enabled:
+            graph.add_node("deep_scrape", self._deep_scrape_step)
+            graph.add_edge("deep_scrape", "extract_details")
+            detail_entry = "deep_scrape"
+        # Pipelined title extraction also extracts the details, so it goes straight to synthesis
+        graph.add_conditional_edges(
+            "extract_titles",
+            lambda state: "synthesize" if state.details_extracted else detail_entry,
+            {detail_entry: detail_entry, "synthesize": "synthesize"}
+        )
         graph.add_edge("extract_details", "synthesize")
         graph.add_edge("synthesize", END)
 
-        return graph.compile()
+        return graph.compile(checkpointer=checkpointer)
+
+    async def _graph(self):
+        """
+        The compiled graph for the running event loop, with a SQLite checkpointer
+        attached when checkpointing is enabled.
+        """
+        if not self.config.checkpoint_enabled:
+            return self.workflow
+        loop = asyncio.get_running_loop()
+        entry = self._checkpointed_graphs.get(loop)
+        if entry is None:
+            path = os.path.join(self.config.cache_dir, "checkpoints.sqlite")
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = await aiosqlite.connect(path)
+            try:
+                saver = AsyncSqliteSaver(conn)
+                await saver.setup()
+            except Exception:
+                await conn.close()
+                raise
+            entry = self._checkpointed_graphs.setdefault(loop, (self._build_workflow(saver), conn))
+            if entry[1] is not conn:
+                await conn.close()
+        return entry[0]
+
+    @property
+    def watch_store(self) -> WatchStore:
+        if self._watch_store is None:
+            self._watch_store = WatchStore(os.path.join(self.config.cache_dir, "watch.sqlite"))
+        return self._watch_store
+
+    @property
+    def results_index(self) -> ResultsIndex:
+        if self._results_index is None:
+            self._results_index = ResultsIndex(os.path.join(self.config.cache_dir, "results.sqlite"))
+            if self.telemetry is not None:
+                self.telemetry.watch_cache("results_index", self._results_index)
+        return self._results_index
+
+    def _thread_config(self, run_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": run_id}, "callbacks": self.callbacks}
     
-    def _search_sources_step(self, state:ResearchDiscoveryState) -> Dict[str, List[Dict]]:
+    async def _search_sources_step(self, state:ResearchDiscoveryState) -> Dict[str, List[Dict]]:
         self.logger.info(f"Searching sources for: {state.query}")
         try:
-            search_results = self.firecrawl.search_research_content(state.query, num_results=10)
+            search_results = await self.firecrawl.asearch_research_content(
+                state.query,
+                num_results=self.config.search_num_results,
+                refresh=self.config.refresh_cache
+            )
             self.logger.info(f"Found {len(search_results)} sources.")
-            return {"search_results": search_results}
+            return {"search_results": [self._offload_source(src, state.run_id) for src in search_results]}
         except Exception as e:
             self.logger.error(f"Error in _search_sources_step: {e}", exc_info=True)
-            return {"error_logs": [str(e)]}
+            return {"error_logs": [*state.error_logs, str(e)]}
+
+    def _offload_source(self, src: Dict[str, Any], owner: str) -> Dict[str, Any]:
+        """
+        Move a search result's full markdown and raw payload into the content
+        store, leaving only the compact fields and their content IDs.
+        """
+        raw = src.get('raw') or {}
+        markdown = raw.get('markdown') or src.get('snippet', '')
+        compact = {key: value for key, value in src.items() if key != 'raw'}
+        compact['content_id'] = self.content_store.put(markdown, owner)
+        compact['raw_id'] = self.content_store.put(
+            {key: value for key, value in raw.items() if key != 'markdown'},
+            owner
+        )
+        return compact
+
+    def _source_markdown(self, src: Dict[str, Any]) -> str:
+        markdown = self.content_store.get(src['content_id']) if src.get('content_id') else None
+        return markdown or src.get('snippet', '')
+
+    async def _pack_context_step(self, state:ResearchDiscoveryState) -> Dict[str, List[Dict]]:
+        self.logger.info("Packing source context.")
+        try:
+            packed, dropped = self.packer.pack(state.query, state.search_results, self._source_markdown)
+            self.logger.info(f"Kept {len(packed)} sources after dropping {dropped} near-duplicates.")
+            kept_ids = {src.get(field) for src in packed for field in ('content_id', 'raw_id')}
+            dropped_ids = [
+                src.get(field)
+                for src in state.search_results
+                for field in ('content_id', 'raw_id')
+                if src.get(field) and src.get(field) not in kept_ids
+            ]
+            if dropped_ids:
+                self.content_store.release(state.run_id, dropped_ids)
+            return {"search_results": packed}
+        except Exception as e:
+            self.logger.error(f"Error in _pack_context_step: {e}", exc_info=True)
+            return {"error_logs": [*state.error_logs, str(e)]}
 
-    def _extract_titles_step(self, state:ResearchDiscoveryState) -> Dict[str, List[Dict]]:
+    async def _select_new_sources_step(self, state:ResearchDiscoveryState) -> Dict[str, Any]:
+        """
+        In watch mode, keep only sources whose URL was not processed by an
+        earlier sweep of the query or whose content hash has changed since.
+        """
+        if not state.incremental:
+            return {}
+        self.logger.info("Selecting sources not seen in earlier sweeps.")
+        try:
+            seen = self.watch_store.seen(state.query)
+            new_sources = [
+                src for src in state.search_results
+                if seen.get(normalize_url(src.get('url', ''))) != src.get('content_id')
+            ]
+            kept_ids = {src.get(field) for src in new_sources for field in ('content_id', 'raw_id')}
+            skipped_ids = [
+                src.get(field)
+                for src in state.search_results
+                for field in ('content_id', 'raw_id')
+                if src.get(field) and src.get(field) not in kept_ids
+            ]
+            if skipped_ids:
+                self.content_store.release(state.run_id, skipped_ids)
+            self.logger.info(f"{len(new_sources)} of {len(state.search_results)} sources are new or changed.")
+            if new_sources:
+                return {"search_results": new_sources}
+            # Nothing changed: the stored results stand as they are
+            return {
+                "search_results": [],
+                "advancements": state.previous_advancements,
+                "synthesis": state.previous_synthesis
+            }
+        except Exception as e:
+            self.logger.error(f"Error in _select_new_sources_step: {e}", exc_info=True)
+            return {"error_logs": [*state.error_logs, str(e)]}
+
+    def _route_after_selection(self, state:ResearchDiscoveryState) -> str:
+        if state.incremental and not state.search_results:
+            return END
+        return "extract_titles"
+
+    async def _extract_titles_step(self, state:ResearchDiscoveryState, config: RunnableConfig) -> Dict[str, Any]:
         self.logger.info("Extracting advancement titles from sources.")
         try:
-            all_content = "\n\n".join([src.get('snippet', '') for src in state.search_results])
+            all_content = self.packer.join_within_budget(
+                [src.get('snippet', '') for src in state.search_results],
+                self.config.title_context_token_budget
+            )
             field, subtopic = (state.query.split('->') + [None, None])[:2]
             messages = [
                 SystemMessage(content=self.prompts.ADVANCEMENT_TITLES_SYSTEM),
                 HumanMessage(content=self.prompts.advancement_titles_user(field.strip() if field else '', subtopic.strip() if subtopic else '', all_content))
             ]
-            response = self.llm.invoke(messages)
-            titles = []
-            for line in response.content.strip().split("\n"):
-                if line.strip():
-                    if '[' in line and ']' in line:
-                        title, link = line.rsplit('[', 1)
-                        main_link = link.strip(' ]') or ""
-                        titles.append({'title': title.strip(), 'main_link': main_link})
-                    else:
-                        titles.append({'title': line.strip(), 'main_link': ""})
+            if self.config.pipelined_titles:
+                return await self._extract_titles_pipelined(state, messages, config)
+            response = await self._ainvoke_routed("titles", messages, PRIORITY_TITLES)
+            titles = [title for title in map(self._parse_title_line, response.content.strip().split("\n")) if title]
             self.logger.info(f"Extracted {len(titles)} advancement titles.")
             return {"advancement_titles": titles}
         except Exception as e:
             self.logger.error(f"Error in _extract_titles_step: {e}", exc_info=True)
-            return {"error_logs": [str(e)]}
+            return {"error_logs": [*state.error_logs, str(e)]}
+
+    @staticmethod
+    def _parse_title_line(line: str) -> Optional[Dict[str, str]]:
+        # "Title [main_link]"; the link is optional
+        if not line.strip():
+            return None
+        if '[' in line and ']' in line:
+            title, link = line.rsplit('[', 1)
+            return {'title': title.strip(), 'main_link': link.strip(' ]') or ""}
+        return {'title': line.strip(), 'main_link': ""}
+
+    async def _extract_titles_pipelined(
+        self,
+        state: ResearchDiscoveryState,
+        messages: List[Any],
+        config: RunnableConfig
+    ) -> Dict[str, Any]:
+        """
+        Stream the title completion and start each title's detail extraction
+        (after its deep scrape, if enabled) as soon as its line is complete, so
+        the two stages overlap. Titles are extracted one per call here, since
+        batching would wait for the stream to finish.
+        """
+        index = SourceIndex(state.search_results)
+        known = self._known_pages(state.search_results)
+        deep_pages = self._live_deep_pages(state.deep_pages)
+        page_tasks: Dict[str, asyncio.Task] = {}
+        scrape_slots = asyncio.Semaphore(self.config.deep_scrape_concurrency)
+        detail_slots = asyncio.Semaphore(self.config.max_concurrency)
+        titles: List[Dict[str, str]] = []
+        tasks: List[asyncio.Task] = []
+        seen_titles = set()
+        extracted_titles: List[str] = []
+
+        async def extract(adv: Dict[str, str]) -> ResearchAdvancement:
+            indexed = self._indexed_advancement(adv)
+            if indexed is not None:
+                self._emit_advancement(indexed)
+                return indexed
+            url = normalize_url(adv['main_link'])
+            if self.config.deep_scrape_enabled and url and url not in deep_pages:
+                # Titles sharing a main link share one fetch
+                if url not in page_tasks:
+                    page_tasks[url] = asyncio.create_task(
+                        self._fetch_deep_page(adv['main_link'], known, state.run_id, scrape_slots)
+                    )
+                # Shielded: a title dropped from the stream must not cancel a fetch others share
+                page_id = await asyncio.shield(page_tasks[url])
+                if page_id:
+                    deep_pages[url] = page_id
+            content = self._detail_content(state.query, index, adv, deep_pages)
+            async with detail_slots:
+                result = await self._ainvoke_routed(
+                    "details",
+                    [
+                        SystemMessage(content=self.prompts.ADVANCEMENT_DETAIL_SYSTEM),
+                        HumanMessage(content=self.prompts.advancement_detail_user(adv['title'], content))
+                    ],
+                    PRIORITY_DETAILS
+                )
+            if result is None:
+                raise ValueError("empty structured output")
+            extracted_titles.append(self._title_key(result.title))
+            self._emit_advancement(result)
+            return result
+
+        def on_line(line: str) -> None:
+            adv = self._parse_title_line(line)
+            key = self._title_key(adv['title']) if adv else ""
+            if not key or key in seen_titles:
+                return
+            seen_titles.add(key)
+            titles.append(adv)
+            tasks.append(asyncio.create_task(extract(adv)))
+
+        errors = []
+        try:
+            try:
+                response = await self._ainvoke_routed(
+                    "titles",
+                    messages,
+                    PRIORITY_TITLES,
+                    config=merge_configs(config, {"callbacks": [_LineStreamHandler(on_line)]}),
+                    stream=True
+                )
+                # Cached responses are not streamed, and the last line has no newline
+                for line in response.content.split("\n"):
+                    on_line(line)
+                # Lines streamed by an attempt that was retried (or escalated) may
+                # not be in the final completion; their extractions are dropped
+                confirmed = {
+                    self._title_key(adv['title'])
+                    for adv in map(self._parse_title_line, response.content.split("\n")) if adv
+                }
+                stale = [i for i, adv in enumerate(titles) if self._title_key(adv['title']) not in confirmed]
+                if stale:
+                    self.logger.warning(f"Dropping {len(stale)} titles streamed by an abandoned attempt.")
+                    for i in stale:
+                        tasks[i].cancel()
+                    titles[:] = [adv for i, adv in enumerate(titles) if i not in stale]
+                    tasks[:] = [task for i, task in enumerate(tasks) if i not in stale]
+            except Exception as e:
+                self.logger.error(f"Error streaming advancement titles: {e}", exc_info=True)
+                errors.append(str(e))
+            self.logger.info(f"Extracted {len(titles)} advancement titles; waiting on their details.")
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in [*tasks, *page_tasks.values()]:
+                task.cancel()
 
-    def _extract_details_step(self, state:ResearchDiscoveryState) -> Dict[str, List[ResearchAdvancement]]:
-        self.logger.info("Extracting detailed advancement information.")
         advancements = []
+        failed = []
+        for adv, result in zip(titles, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error extracting details for {adv['title']}: {result}", exc_info=result)
+                errors.append(f"{adv['title']}: {result}")
+                failed.append(adv)
+            else:
+                advancements.append(result)
+        if state.incremental:
+            advancements = self._merge_advancements(advancements, state.previous_advancements)
+        self.logger.info(f"Extracted details for {len(advancements)} advancements.")
+        return {
+            "advancement_titles": titles,
+            "advancements": advancements,
+            "failed_titles": failed,
+            "extracted_titles": extracted_titles,
+            "deep_pages": deep_pages,
+            "details_extracted": True,
+            "error_logs": [*state.error_logs, *errors]
+        }
+
+    async def _deep_scrape_step(self, state:ResearchDiscoveryState) -> Dict[str, Any]:
+        """
+        Fetch the full page behind each pending advancement's main link. Pages
+        search already returned are read from the content store; the rest are
+        scraped concurrently, at most deep_scrape_per_domain at a time per host.
+        """
+        self.logger.info("Deep-scraping advancement main links.")
+        pending = state.failed_titles or state.advancement_titles
+        try:
+            known = self._known_pages(state.search_results)
+            deep_pages = self._live_deep_pages(state.deep_pages)
+            links: Dict[str, str] = {}
+            for adv in pending:
+                link = (adv.get('main_link') or '').strip()
+                url = normalize_url(link)
+                # Indexed titles keep their stored details, so their pages are not needed
+                if url and url not in deep_pages and self._indexed_advancement(adv) is None:
+                    links.setdefault(url, link)
+            semaphore = asyncio.Semaphore(self.config.deep_scrape_concurrency)
+            page_ids = await asyncio.gather(
+                *(self._fetch_deep_page(link, known, state.run_id, semaphore) for link in links.values())
+            )
+            ready = {url: page_id for url, page_id in zip(links, page_ids) if page_id}
+            deep_pages.update(ready)
+            reused = sum(1 for url in links if url in known)
+            self.logger.info(
+                f"Deep pages ready for {len(ready)} of {len(links)} main links "
+                f"({reused} from search results)."
+            )
+            return {"deep_pages": deep_pages}
+        except Exception as e:
+            self.logger.error(f"Error in _deep_scrape_step: {e}", exc_info=True)
+            return {"error_logs": [*state.error_logs, str(e)]}
+
+    def _live_deep_pages(self, deep_pages: Dict[str, str]) -> Dict[str, str]:
+        """
+        The deep pages whose content is still stored. A finished run releases
+        its pages, so a retry of that run has to fetch them again.
+        """
+        live = {url: page_id for url, page_id in deep_pages.items() if self.content_store.get(page_id)}
+        if len(live) < len(deep_pages):
+            self.logger.info(f"{len(deep_pages) - len(live)} deep pages were released; fetching them again.")
+        return live
+
+    @staticmethod
+    def _known_pages(search_results: List[Dict[str, Any]]) -> Dict[str, str]:
+        return {
+            normalize_url(src.get('url', '')): src['content_id']
+            for src in search_results if src.get('content_id')
+        }
+
+    async def _fetch_deep_page(
+        self,
+        link: str,
+        known: Dict[str, str],
+        owner: str,
+        semaphore: asyncio.Semaphore
+    ) -> Optional[str]:
+        """
+        Content store ID of a main link's full page: the stored search result
+        if search returned it, else a fresh scrape. None if the scrape fails.
+        """
+        url = normalize_url(link)
+        if known.get(url) and self.content_store.get(known[url]):
+            return known[url]
+        try:
+            markdown = await self._scrape_page(link, semaphore)
+        except Exception as e:
+            self.logger.warning(f"Deep scrape of {link} failed ({e!r}); using search snippets.")
+            return None
+        if not markdown:
+            self.logger.warning(f"Deep scrape of {link} returned no content; using search snippets.")
+            return None
+        # The store is content-addressed, so mirrors of one page share an entry
+        return self.content_store.put(markdown, owner)
+
+    async def _scrape_page(self, link: str, semaphore: asyncio.Semaphore) -> str:
+        # Wait for the host first, so queued pages of a busy host do not hold run-wide slots
+        async with self._domain_slot(urlsplit(normalize_url(link)).netloc), semaphore:
+            page = await asyncio.wait_for(
+                self.firecrawl.ascrape_research_page(link, refresh=self.config.refresh_cache),
+                self.config.deep_scrape_timeout_seconds
+            )
+        if page.get('status') not in ('success', 'no_content'):
+            raise RuntimeError(page.get('error') or page.get('status'))
+        return page.get('markdown') or ''
+
+    def _domain_slot(self, host: str) -> asyncio.Semaphore:
+        slots = self._domain_slots.setdefault(asyncio.get_running_loop(), {})
+        if host not in slots:
+            slots[host] = asyncio.Semaphore(self.config.deep_scrape_per_domain)
+        return slots[host]
+
+    def _deep_passages(self, query: str, adv: Dict[str, str], deep_pages: Dict[str, str]) -> str:
+        """
+        The passages of an advancement's deep-scraped main page most relevant
+        to its title and the query, or "" when there is no such page.
+        """
+        page_id = deep_pages.get(normalize_url(adv.get('main_link') or ''))
+        markdown = self.content_store.get(page_id) if page_id else None
+        if not markdown:
+            return ""
+        terms = set(tokenize(adv['title'])) | set(tokenize(query.replace('->', ' ')))
+        passages, _ = self.packer.select_passages(markdown, terms, self.config.deep_scrape_token_budget)
+        return passages
+
+    async def _extract_details_step(self, state:ResearchDiscoveryState) -> Dict[str, List[ResearchAdvancement]]:
+        self.logger.info("Extracting detailed advancement information.")
+        # When retrying a run, only the previously failed titles are re-extracted
+        # and the advancements that already succeeded are kept.
+        retrying = bool(state.failed_titles)
+        pending = state.failed_titles if retrying else state.advancement_titles
+        advancements = list(state.advancements) if retrying else []
+        extracted_titles = list(state.extracted_titles) if retrying else []
+        failed = []
         errors = []
         try:
-            for adv in state.advancement_titles:
-                related_contents = []
-                for src in state.search_results:
-                    if adv['main_link'] and adv['main_link'] in src.get('url', ''):
-                        related_contents.append(src.get('snippet', ''))
-                    elif adv['title'].lower() in src.get('title', '').lower():
-                        related_contents.append(src.get('snippet', ''))
-                combined_content = "\n\n".join(related_contents)
-                if not combined_content:
-                    self.logger.warning(f"No content found for advancement: {adv['title']}")
-                try:
-                    messages = [
+            # Titles already in the results index keep their stored details; only the rest are extracted
+            reused = {}
+            for i, adv in enumerate(pending):
+                indexed = self._indexed_advancement(adv)
+                if indexed is not None:
+                    reused[i] = indexed
+            todo = [i for i in range(len(pending)) if i not in reused]
+            if reused:
+                self.logger.info(f"Reusing {len(reused)} indexed advancements; extracting {len(todo)}.")
+            pending = [pending[i] for i in todo]
+
+            index = SourceIndex(state.search_results)
+            contents = [self._detail_content(state.query, index, adv, state.deep_pages) for adv in pending]
+
+            extracted: Dict[int, ResearchAdvancement] = {}
+            singles = list(range(len(pending)))
+            if self.config.detail_batch_token_budget:
+                batches = self._plan_detail_batches(pending, contents)
+                singles = [i for batch in batches if len(batch) == 1 for i in batch]
+                multi = [batch for batch in batches if len(batch) > 1]
+                if multi:
+                    extracted, fallback = await self._extract_detail_batches(pending, contents, multi)
+                    singles = sorted(singles + fallback)
+
+            # Fan out one structured call per remaining title; results keep input
+            # order and carry per-item exceptions instead of aborting the whole step.
+            results = await self._abatch_llm(
+                "details",
+                [
+                    [
                         SystemMessage(content=self.prompts.ADVANCEMENT_DETAIL_SYSTEM),
-                        HumanMessage(content=self.prompts.advancement_detail_user(adv['title'], combined_content))
+                        HumanMessage(content=self.prompts.advancement_detail_user(pending[i]['title'], contents[i]))
                     ]
-                    # Use function_calling method to avoid OpenAI schema issues
-                    structured_llm = self.llm.with_structured_output(ResearchAdvancement, method="function_calling")
-                    advancement = structured_llm.invoke(messages)
-                    advancements.append(advancement)
-                except Exception as e:
-                    self.logger.error(f"Error extracting details for {adv['title']}: {e}", exc_info=True)
-                    errors.append(f"{adv['title']}: {e}")
+                    for i in singles
+                ],
+                PRIORITY_DETAILS
+            )
+            for i, result in zip(singles, results):
+                adv = pending[i]
+                if isinstance(result, Exception):
+                    self.logger.error(f"Error extracting details for {adv['title']}: {result}", exc_info=result)
+                    errors.append(f"{adv['title']}: {result}")
+                    failed.append(adv)
+                elif result is None:
+                    self.logger.error(f"Error extracting details for {adv['title']}: empty structured output")
+                    errors.append(f"{adv['title']}: empty structured output")
+                    failed.append(adv)
+                else:
+                    extracted[i] = result
+            extracted_titles.extend(self._title_key(adv.title) for adv in extracted.values())
+            extracted = {todo[i]: adv for i, adv in extracted.items()}
+            extracted.update(reused)
+            for i in sorted(extracted):
+                advancements.append(extracted[i])
+                self._emit_advancement(extracted[i])
+            if state.incremental:
+                advancements = self._merge_advancements(advancements, state.previous_advancements)
             self.logger.info(f"Extracted details for {len(advancements)} advancements.")
-            return {"advancements": advancements, "error_logs": errors}
+            return {
+                "advancements": advancements,
+                "failed_titles": failed,
+                "extracted_titles": extracted_titles,
+                "error_logs": [*state.error_logs, *errors]
+            }
         except Exception as e:
             self.logger.error(f"Error in _extract_details_step: {e}", exc_info=True)
-            return {"error_logs": [str(e)]}
+            return {"error_logs": [*state.error_logs, str(e)]}
+
+    def _detail_content(
+        self,
+        query: str,
+        index: SourceIndex,
+        adv: Dict[str, str],
+        deep_pages: Dict[str, str]
+    ) -> str:
+        """
+        Source text for one advancement's detail extraction: its matched
+        search snippets, led by its deep-scraped main page when there is one.
+        """
+        matches = index.lookup(
+            adv['title'],
+            adv['main_link'],
+            limit=self.config.max_sources_per_advancement
+        )
+        related_contents = [src.get('snippet', '') for src in matches]
+        deep = self._deep_passages(query, adv, deep_pages)
+        if deep:
+            # The full page supersedes the search snippet of the same URL
+            main_url = normalize_url(adv['main_link'])
+            related_contents = [deep] + [
+                src.get('snippet', '') for src in matches
+                if normalize_url(src.get('url', '')) != main_url
+            ]
+        combined_content = "\n\n".join(related_contents)
+        if not combined_content:
+            self.logger.warning(f"No content found for advancement: {adv['title']}")
+        return combined_content
+
+    @staticmethod
+    def _emit_advancement(adv: ResearchAdvancement) -> None:
+        # Surfaces through graph.astream(stream_mode="custom") as soon as it is ready
+        get_stream_writer()({"advancement": adv})
 
-    def _synthesize_step(self, state:ResearchDiscoveryState) -> Dict[str, str]:
+    def _indexed_advancement(self, adv: Dict[str, str]) -> Optional[ResearchAdvancement]:
+        """
+        The stored advancement for a title (by its main link's paper, else by
+        title) if the results index has a fresh one and prefill is on.
+        """
+        if not (self.config.results_index_enabled and self.config.index_prefill) or self.config.refresh_cache:
+            return None
+        try:
+            return self.results_index.find(
+                adv['title'],
+                adv.get('main_link') or "",
+                max_age_seconds=self.config.index_reuse_max_age_seconds
+            )
+        except Exception as e:
+            self.logger.warning(f"Results index lookup failed for {adv['title']}: {e}")
+            return None
+
+    def _plan_detail_batches(self, pending: List[Dict[str, str]], contents: List[str]) -> List[List[int]]:
+        """
+        Group titles, in order, into batches whose prompts fit the batch token
+        budget and item limit. A title too large for any batch gets its own.
+        """
+        budget = self.config.detail_batch_token_budget
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for i, (adv, content) in enumerate(zip(pending, contents)):
+            cost = self.packer.tokens.count(adv['title']) + self.packer.tokens.count(content)
+            if current and (used + cost > budget or len(current) >= self.config.detail_batch_max_items):
+                batches.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _extract_detail_batches(
+        self,
+        pending: List[Dict[str, str]],
+        contents: List[str],
+        batches: List[List[int]]
+    ):
+        """
+        Extract several advancements per structured call. Returns the extracted
+        advancements by title index, and the indices that need a single-item
+        retry (failed call, missing entry or an entry that fails validation).
+        """
+        results = await self._abatch_llm(
+            "details",
+            [
+                [
+                    SystemMessage(content=self.prompts.ADVANCEMENT_DETAIL_BATCH_SYSTEM),
+                    HumanMessage(content=self.prompts.advancement_detail_batch_user(
+                        [(pending[i]['title'], contents[i]) for i in batch]
+                    ))
+                ]
+                for batch in batches
+            ],
+            PRIORITY_DETAILS,
+            outputs=[len(batch) for batch in batches],
+            runnable=self.detail_batch_llm
+        )
+        extracted: Dict[int, ResearchAdvancement] = {}
+        fallback: List[int] = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception) or not isinstance(result, dict):
+                self.logger.warning(f"Batched extraction of {len(batch)} advancements failed, retrying one by one: {result}")
+                fallback.extend(batch)
+                continue
+            items = result.get('advancements') or []
+            by_title: Dict[str, int] = {}
+            for index, item in enumerate(items):
+                if isinstance(item, dict):
+                    by_title.setdefault(self._title_key(item.get('title')), index)
+            # Trust titles first, for the whole batch, so the position fallback
+            # below never hands out an item that another title matched
+            matched = {}
+            for i in batch:
+                index = by_title.pop(self._title_key(pending[i]['title']), None)
+                if index is not None:
+                    matched[i] = index
+            used = set(matched.values())
+            for position, i in enumerate(batch):
+                # Fall back to position when the model reworded the title, unless that item is taken
+                index = matched.get(i)
+                if (
+                    index is None and len(items) == len(batch) and position not in used
+                    and isinstance(items[position], dict)
+                ):
+                    index = position
+                    used.add(position)
+                try:
+                    if index is None:
+                        raise ValueError("missing from batched output")
+                    extracted[i] = ResearchAdvancement.model_validate(items[index])
+                except Exception as e:
+                    self.logger.warning(f"Batched extraction for {pending[i]['title']} unusable ({e}); retrying alone.")
+                    fallback.append(i)
+        self.logger.info(
+            f"Batched {sum(len(b) for b in batches)} advancements into {len(batches)} calls; {len(fallback)} need single-item retries."
+        )
+        return extracted, fallback
+
+    def _merge_advancements(
+        self,
+        new: List[ResearchAdvancement],
+        previous: List[ResearchAdvancement]
+    ) -> List[ResearchAdvancement]:
+        """
+        New advancements first, then stored ones they do not supersede (same
+        title), capped at `watch_max_advancements`.
+        """
+        merged = []
+        seen_titles = set()
+        for adv in [*new, *previous]:
+            key = self._title_key(adv.title)
+            if key not in seen_titles:
+                seen_titles.add(key)
+                merged.append(adv)
+        return merged[:self.config.watch_max_advancements]
+
+    async def _ainvoke_llm(
+        self,
+        runnable,
+        messages: List[Any],
+        priority: int,
+        outputs: int = 1,
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Invoke a chat model (or structured-output runnable) with OpenAI
+        retries. A request that misses the LLM cache is charged the prompt
+        plus `outputs` completion estimates by the model's rate limiter.
+        """
+        tokens = sum(self.packer.tokens.count(str(message.content)) for message in messages)
+        tokens += self.config.openai_completion_token_estimate * outputs
+        with self.model_limiter.request(tokens, priority):
+            return await self.scheduler.run(
+                "openai",
+                lambda: runnable.ainvoke(messages, config, **kwargs),
+                pace=False
+            )
+
+    async def _ainvoke_routed(
+        self,
+        step: str,
+        messages: List[Any],
+        priority: int,
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Invoke a step's routed model. When the step has an escalation model
+        and the output fails validation or is incomplete, the same prompt is
+        re-run once on the escalation model; otherwise the output (or error)
+        is returned as it is.
+        """
+        runnable, escalation = self.routes[step]
+        try:
+            output = await self._ainvoke_llm(runnable, messages, priority, config=config, **kwargs)
+        except Exception as e:
+            # Only malformed output is worth another model; API errors (rate limits,
+            # bad requests, auth, unknown models) would fail the same way there
+            if escalation is None or not isinstance(e, (OutputParserException, ValidationError)):
+                raise
+            reason = "invalid"
+            self.logger.warning(f"{step} output failed validation ({e}); escalating to {self.config.escalation_model}.")
+        else:
+            if escalation is None or self._usable_output(step, output):
+                return output
+            reason = "incomplete"
+            self.logger.warning(f"{step} output is incomplete; escalating to {self.config.escalation_model}.")
+        if self.telemetry is not None:
+            self.telemetry.registry.inc("research_llm_escalations_total", step=step, reason=reason)
+        return await self._ainvoke_llm(escalation, messages, priority, config=config, **kwargs)
+
+    def _usable_output(self, step: str, output: Any) -> bool:
+        # Titles need at least one parseable line, details a title and a real summary, synthesis some text
+        if step == "titles":
+            return any(map(self._parse_title_line, str(output.content).split("\n")))
+        if step == "details":
+            return (
+                output is not None
+                and bool(output.title.strip())
+                and len(output.summary.split()) >= self.config.escalation_min_summary_words
+            )
+        return bool(str(output.content).strip())
+
+    async def _abatch_llm(
+        self,
+        step: str,
+        prompts: List[List[Any]],
+        priority: int,
+        outputs: Optional[List[int]] = None,
+        runnable: Any = None
+    ) -> List[Any]:
+        """
+        Like abatch(return_exceptions=True) capped at max_concurrency. Calls
+        go through the step's route (with escalation), or straight to
+        `runnable` through _ainvoke_llm when one is given.
+        """
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+
+        async def invoke(messages: List[Any], count: int):
+            async with semaphore:
+                if runnable is not None:
+                    return await self._ainvoke_llm(runnable, messages, priority, count)
+                return await self._ainvoke_routed(step, messages, priority)
+
+        return await asyncio.gather(
+            *(invoke(messages, count) for messages, count in zip(prompts, outputs or [1] * len(prompts))),
+            return_exceptions=True
+        )
+
+    @staticmethod
+    def _title_key(title: Any) -> str:
+        return " ".join(str(title or "").lower().split())
+
+    async def _synthesize_step(self, state:ResearchDiscoveryState) -> Dict[str, str]:
+        if state.incremental and state.previous_synthesis and state.advancements == state.previous_advancements:
+            self.logger.info("No new advancements; keeping the stored synthesis.")
+            return {"synthesis": state.previous_synthesis}
         self.logger.info("Synthesizing overall trends and future directions.")
         try:
             field, subtopic = (state.query.split('->') + [None, None])[:2]
@@ -129,25 +1001,291 @@ class Workflow:
                 HumanMessage(content=self.prompts.synthesis_user(
                     field.strip() if field else '',
                     subtopic.strip() if subtopic else '',
-                    state.advancements
+                    json.dumps(
+                        [adv.model_dump(exclude_defaults=True) for adv in state.advancements],
+                        ensure_ascii=False
+                    )
                 ))
             ]
-            response = self.llm.invoke(messages)
+            response = await self._ainvoke_routed("synthesis", messages, PRIORITY_SYNTHESIS)
             self.logger.info("Synthesis complete.")
             return {"synthesis": response.content}
         except Exception as e:
             self.logger.error(f"Error in _synthesize_step: {e}", exc_info=True)
-            return {"error_logs": [str(e)]}
-            
-    
-    
+            return {"error_logs": [*state.error_logs, str(e)]}
+
     def run(self, query: str) -> ResearchDiscoveryState:
-        self.logger.info(f"Starting research workflow for query: {query}")
-        initial_state = self.state_cls(query=query)
+        """
+        Synchronous wrapper around arun() for callers without a running event loop.
+        """
+        async def run_once() -> ResearchDiscoveryState:
+            try:
+                return await self.arun(query)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run_once())
+
+    async def arun(
+        self,
+        query: str,
+        run_id: Optional[str] = None,
+        incremental: bool = False,
+        on_advancement: Optional[Callable[[ResearchAdvancement], None]] = None
+    ) -> ResearchDiscoveryState:
+        """
+        Run the workflow for a query. With `incremental`, only sources that
+        earlier incremental runs of the query have not processed (or whose
+        content changed) go through title and detail extraction; the new
+        advancements are merged into the stored results before synthesis.
+        `on_advancement` is called with each newly extracted advancement as
+        soon as it is ready, before the run finishes.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        if not incremental:
+            answered = self._answer_from_index(query, run_id, on_advancement)
+            if answered is not None:
+                return answered
+        mode = " in watch mode" if incremental else ""
+        self.logger.info(f"Starting research workflow for query: {query} (run {run_id}){mode}")
+        initial_state = self._initial_state(query, run_id, incremental)
+        return await self._execute(query, run_id, initial_state, on_advancement)
+
+    def _answer_from_index(
+        self,
+        query: str,
+        run_id: str,
+        on_advancement: Optional[Callable[[ResearchAdvancement], None]] = None
+    ) -> Optional[ResearchDiscoveryState]:
+        """
+        A finished state built from the results index alone, when it holds at
+        least `index_answer_min_results` fresh advancements and a synthesis for
+        the query; otherwise None and the query is researched live.
+        """
+        minimum = self.config.index_answer_min_results
+        if not (self.config.results_index_enabled and minimum) or self.config.refresh_cache:
+            return None
+        start = time.perf_counter()
         try:
-            final_state = self.workflow.invoke(initial_state)
+            advancements, synthesis = self.results_index.lookup(
+                query,
+                max_age_seconds=self.config.index_answer_max_age_seconds,
+                limit=self.config.watch_max_advancements
+            )
+        except Exception as e:
+            self.logger.warning(f"Results index lookup failed for {query}: {e}")
+            return None
+        if len(advancements) < minimum or not synthesis:
+            return None
+        self.logger.info(f"Answering {query} from the results index ({len(advancements)} advancements).")
+        if on_advancement is not None:
+            for adv in advancements:
+                try:
+                    on_advancement(adv)
+                except Exception as e:
+                    self.logger.warning(f"on_advancement callback failed: {e}")
+        state = self.state_cls(query=query, run_id=run_id, advancements=advancements, synthesis=synthesis)
+        state.output = self._build_output(state, time.perf_counter() - start)
+        state.output.from_index = True
+        return state
+
+    def _initial_state(self, query: str, run_id: str, incremental: bool = False) -> ResearchDiscoveryState:
+        if not incremental:
+            return self.state_cls(query=query, run_id=run_id)
+        previous_advancements, previous_synthesis = self.watch_store.load_results(query)
+        return self.state_cls(
+            query=query,
+            run_id=run_id,
+            incremental=True,
+            previous_advancements=previous_advancements,
+            previous_synthesis=previous_synthesis
+        )
+
+    async def aresume(self, run_id: str) -> ResearchDiscoveryState:
+        """
+        Continue a checkpointed run from its last completed node. A finished run
+        whose search, titles or synthesis step logged an error and produced
+        nothing is rewound to re-run that step.
+        """
+        if not self.config.checkpoint_enabled:
+            return self._no_checkpoint(run_id)
+        graph = await self._graph()
+        config = self._thread_config(run_id)
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            self.logger.error(f"No checkpoint found for run {run_id}")
+            return self.state_cls(query="", run_id=run_id, error_logs=[f"No checkpoint found for run {run_id}"])
+
+        state = self.state_cls(**snapshot.values)
+        if snapshot.next:
+            self.logger.info(f"Resuming run {run_id} at {', '.join(snapshot.next)}")
+            return await self._execute(state.query, run_id, None)
+
+        if state.incremental and not state.search_results and not state.error_logs:
+            self.logger.info(f"Run {run_id} found nothing new; nothing to resume.")
+            state.output = self._build_output(state)
+            return state
+        if not state.search_results:
+            self.logger.info(f"Run {run_id} found no sources; restarting from search.")
+            return await self._execute(
+                state.query,
+                run_id,
+                self._initial_state(state.query, run_id, state.incremental)
+            )
+        if not state.advancement_titles:
+            rewind_to = "pack_context"
+        elif state.synthesis is None and state.advancements:
+            rewind_to = "extract_details"
+        else:
+            self.logger.info(f"Run {run_id} already completed; nothing to resume.")
+            state.output = self._build_output(state)
+            return state
+        self.logger.info(f"Resuming run {run_id} after {rewind_to}")
+        await graph.aupdate_state(config, {"error_logs": []}, as_node=rewind_to)
+        return await self._execute(state.query, run_id, None)
+
+    async def aretry_failed(self, run_id: str) -> ResearchDiscoveryState:
+        """
+        Re-extract only the advancements whose detail extraction failed in a
+        checkpointed run, then re-synthesize with the merged results.
+        """
+        if not self.config.checkpoint_enabled:
+            return self._no_checkpoint(run_id)
+        graph = await self._graph()
+        config = self._thread_config(run_id)
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            self.logger.error(f"No checkpoint found for run {run_id}")
+            return self.state_cls(query="", run_id=run_id, error_logs=[f"No checkpoint found for run {run_id}"])
+
+        state = self.state_cls(**snapshot.values)
+        if not state.failed_titles:
+            self.logger.info(f"Run {run_id} has no failed advancements to retry.")
+            state.output = self._build_output(state)
+            return state
+        self.logger.info(f"Retrying {len(state.failed_titles)} failed advancements for run {run_id}")
+        await graph.aupdate_state(config, {"error_logs": [], "details_extracted": False}, as_node="extract_titles")
+        return await self._execute(state.query, run_id, None)
+
+    async def _execute(
+        self,
+        query: str,
+        run_id: str,
+        graph_input: Optional[ResearchDiscoveryState],
+        on_advancement: Optional[Callable[[ResearchAdvancement], None]] = None
+    ) -> ResearchDiscoveryState:
+        graph = await self._graph()
+        start = time.perf_counter()
+        completed = False
+        try:
+            if on_advancement is None:
+                values = await graph.ainvoke(graph_input, self._thread_config(run_id))
+            else:
+                values = None
+                async for mode, chunk in graph.astream(
+                    graph_input,
+                    self._thread_config(run_id),
+                    stream_mode=["custom", "values"]
+                ):
+                    if mode == "values":
+                        values = chunk
+                    elif isinstance(chunk, dict) and chunk.get("advancement") is not None:
+                        try:
+                            on_advancement(chunk["advancement"])
+                        except Exception as e:
+                            self.logger.warning(f"on_advancement callback failed: {e}")
+            final_state = self.state_cls(**values)
+            final_state.output = self._build_output(final_state, time.perf_counter() - start)
+            completed = True
+            if final_state.incremental:
+                self._record_sweep(final_state)
+            self._index_results(final_state)
+            if not final_state.error_logs and not final_state.failed_titles:
+                await self._drop_checkpoint(graph, run_id)
             self.logger.info("Workflow completed successfully.")
-            return self.state_cls(**final_state)
+            return final_state
         except Exception as e:
             self.logger.critical(f"Workflow failed: {e}", exc_info=True)
-            return self.state_cls(query=query, error_logs=[str(e)])
\ No newline at end of file
+            return self.state_cls(query=query, run_id=run_id, error_logs=[str(e)])
+        finally:
+            # Page content is only needed while the graph runs; keep it for
+            # interrupted checkpointed runs so a resume can still read it. Only
+            # the disk store outlives the process, so in memory it would just leak.
+            resumable = self.config.checkpoint_enabled and isinstance(self.content_store, DiskContentStore)
+            if completed or not resumable:
+                self.content_store.release(run_id)
+
+    def _no_checkpoint(self, run_id: str) -> ResearchDiscoveryState:
+        self.logger.error(f"Cannot resume run {run_id}: checkpointing is disabled")
+        return self.state_cls(query="", run_id=run_id, error_logs=["Checkpointing is disabled; runs cannot be resumed"])
+
+    async def _drop_checkpoint(self, graph, run_id: str) -> None:
+        """
+        Delete a cleanly finished run's checkpoint thread, so checkpoints.sqlite
+        only holds runs that may still be resumed or retried.
+        """
+        if graph.checkpointer is None or self.config.checkpoint_keep_completed:
+            return
+        try:
+            await graph.checkpointer.adelete_thread(run_id)
+        except Exception as e:
+            self.logger.warning(f"Deleting the checkpoint of run {run_id} failed: {e}")
+
+    def _record_sweep(self, state: ResearchDiscoveryState) -> None:
+        """
+        Store a clean incremental run's sources as seen, with the merged results.
+        Runs with errors, failed titles or no titles at all are not recorded, so
+        their sources are picked up again by the next sweep (or by a resume or
+        retry of this run).
+        """
+        if not state.search_results or state.error_logs or state.failed_titles:
+            return
+        if not state.advancement_titles:
+            self.logger.warning(f"No titles extracted from {len(state.search_results)} new sources; not recording the sweep.")
+            return
+        try:
+            self.watch_store.record(state.query, state.search_results, state.advancements, state.synthesis)
+            self.logger.info(f"Recorded {len(state.search_results)} sources for watched query: {state.query}")
+        except Exception as e:
+            self.logger.error(f"Recording watch state failed: {e}", exc_info=True)
+
+    def _index_results(self, state: ResearchDiscoveryState) -> None:
+        """
+        Add a finished run's advancements (and synthesis, if it has one) to the
+        results index. Failed titles are simply absent, so later runs extract
+        them; reused advancements and a kept watch synthesis keep their age.
+        """
+        if not self.config.results_index_enabled or not state.advancements:
+            return
+        synthesis = state.synthesis if state.synthesis != state.previous_synthesis else None
+        try:
+            added = self.results_index.record(
+                state.query,
+                state.advancements,
+                synthesis,
+                state.run_id,
+                extracted=set(state.extracted_titles)
+            )
+            self.logger.info(f"Indexed {len(state.advancements)} advancements ({added} new) for: {state.query}")
+        except Exception as e:
+            self.logger.error(f"Indexing results failed: {e}", exc_info=True)
+
+    async def aclose(self) -> None:
+        """
+        Release pooled connections held for the running event loop.
+        """
+        await self.firecrawl.aclose()
+        entry = self._checkpointed_graphs.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].close()
+
+    def _build_output(self, state: ResearchDiscoveryState, elapsed: Optional[float] = None) -> ResearchDiscoveryOutput:
+        field, subtopic = (state.query.split('->') + [None, None])[:2]
+        return ResearchDiscoveryOutput(
+            field=field.strip() if field else '',
+            subtopic=subtopic.strip() if subtopic else '',
+            advancements=state.advancements,
+            synthesis=state.synthesis or '',
+            search_time=f"{elapsed:.2f}s" if elapsed is not None else None,
+            new_sources=len(state.search_results) if state.incremental else None
+        )
@@ -0,0 +1,92 @@
+import asyncio
+from src.config import WorkflowConfig
+from src.fakes import FakeFirecrawlService, FakeResearchChatModel
+from src.workflow import Workflow
+
+TITLES = ["Graph transformers at scale", "Sparse message passing", "Equivariant pooling"]
+
+
+class ScriptedBatchChatModel(FakeResearchChatModel):
+    """
+    Answers batched detail calls with `script(items)` applied to the fake's
+    normal output, to simulate reworded, duplicated or missing entries.
+    """
+
+    script: object = None
+
+    def _advancement_batch(self, messages):
+        output = super()._advancement_batch(messages)
+        if self.script is not None:
+            output["advancements"] = self.script(output["advancements"])
+        return output
+
+
+def make_workflow(tmp_path, llm, **overrides):
+    config = WorkflowConfig(
+        cache_dir=str(tmp_path),
+        llm_cache_backend="none",
+        checkpoint_enabled=False,
+        results_index_enabled=False,
+        metrics_enabled=False,
+        **overrides
+    )
+    return Workflow(config, firecrawl=FakeFirecrawlService(), llm=llm)
+
+
+def extract(workflow, titles=TITLES):
+    pending = [{"title": title, "main_link": ""} for title in titles]
+    contents = [f"{title} content." for title in titles]
+    return asyncio.run(workflow._extract_detail_batches(pending, contents, [list(range(len(titles)))]))
+
+
+def test_plan_respects_item_limit_and_token_budget(tmp_path):
+    workflow = make_workflow(tmp_path, FakeResearchChatModel(), detail_batch_max_items=2, detail_batch_token_budget=200)
+    pending = [{"title": f"Title {i}", "main_link": ""} for i in range(5)]
+    contents = ["short"] * 5
+    contents[3] = "long " * 400
+    assert workflow._plan_detail_batches(pending, contents) == [[0, 1], [2], [3], [4]]
+
+
+def test_all_entries_matched_by_title(tmp_path):
+    llm = ScriptedBatchChatModel(script=lambda items: list(reversed(items)))
+    extracted, fallback = extract(make_workflow(tmp_path, llm))
+    assert fallback == []
+    assert {i: adv.title for i, adv in extracted.items()} == dict(enumerate(TITLES))
+
+
+def test_reworded_title_matched_by_position(tmp_path):
+    def reword(items):
+        items[1]["title"] = "Message passing, made sparse"
+        return items
+
+    extracted, fallback = extract(make_workflow(tmp_path, ScriptedBatchChatModel(script=reword)))
+    assert fallback == []
+    assert extracted[1].title == "Message passing, made sparse"
+    assert [extracted[i].title for i in (0, 2)] == [TITLES[0], TITLES[2]]
+
+
+def test_duplicated_title_is_used_once(tmp_path):
+    # An extra copy of the first entry must not shift the others onto the wrong titles
+    extracted, fallback = extract(make_workflow(tmp_path, ScriptedBatchChatModel(script=lambda items: [items[0], *items])))
+    assert fallback == []
+    assert {i: adv.title for i, adv in extracted.items()} == dict(enumerate(TITLES))
+
+
+def test_missing_entry_falls_back_to_single_call(tmp_path):
+    extracted, fallback = extract(make_workflow(tmp_path, ScriptedBatchChatModel(script=lambda items: items[:1] + items[2:])))
+    assert fallback == [1]
+    assert sorted(extracted) == [0, 2]
+
+
+def test_invalid_entry_is_extracted_alone(tmp_path):
+    llm = FakeResearchChatModel(num_titles=4, invalid_every=2)
+    workflow = make_workflow(tmp_path, llm, search_num_results=6)
+    try:
+        result = asyncio.run(workflow.arun("CS -> Graph Learning"))
+    finally:
+        asyncio.run(workflow.aclose())
+    assert result.error_logs == []
+    assert len(result.advancements) == 4
+    assert all(adv.summary for adv in result.advancements)
+    # Titles, one batch for all four, two single-item retries and the synthesis
+    assert llm.usage["calls"] == 5
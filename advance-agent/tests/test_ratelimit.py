@@ -0,0 +1,137 @@
+import asyncio
+import time
+import httpx
+import pytest
+from src import ratelimit
+from src.ratelimit import (
+    PRIORITY_DETAILS,
+    PRIORITY_SYNTHESIS,
+    ModelRateLimiter,
+    ProviderLimiter,
+    RateLimitScheduler,
+)
+
+
+def status_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.example.com/v1")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+class FlakyCall:
+    """
+    Raises the given errors in turn, then returns "ok"; records when each attempt started.
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.started = []
+
+    async def __call__(self):
+        self.started.append(time.monotonic())
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    # Records the upper bound of every jitter draw and draws nothing
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append(high)
+        return 0.0
+
+    monkeypatch.setattr(ratelimit.random, "uniform", uniform)
+    return bounds
+
+
+def test_queued_callers_run_by_priority_then_arrival():
+    async def scenario():
+        limiter = ProviderLimiter()
+        # Hold the queue so every caller below has to wait its turn
+        limiter.pause(0.1)
+        order = []
+
+        async def caller(name, priority):
+            await limiter.acquire(priority=priority)
+            order.append(name)
+
+        tasks = []
+        for name, priority in [("details-1", PRIORITY_DETAILS), ("details-2", PRIORITY_DETAILS), ("synthesis", PRIORITY_SYNTHESIS)]:
+            tasks.append(asyncio.create_task(caller(name, priority)))
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["synthesis", "details-1", "details-2"]
+
+
+def test_request_bucket_paces_calls():
+    async def scenario():
+        limiter = ProviderLimiter(requests_per_minute=600)
+        limiter.requests.level = 0
+        waited = [await limiter.acquire() for _ in range(2)]
+        return waited
+
+    first, second = asyncio.run(scenario())
+    # 600 per minute refills one request every 0.1s
+    assert 0.05 <= first <= 0.3
+    assert 0.05 <= second <= 0.3
+
+
+def test_retry_after_is_used_and_pauses_the_queue(no_jitter):
+    async def scenario():
+        scheduler = RateLimitScheduler(max_retries=2, backoff_base_seconds=0.01)
+        limiter = scheduler.limiter("openai")
+        call = FlakyCall(status_error(429, {"retry-after": "0.2"}))
+        run = asyncio.create_task(scheduler.run("openai", call))
+        await asyncio.sleep(0.05)
+        # A caller arriving during the pause waits it out as well
+        waited = await limiter.acquire()
+        return await run, call.started, waited
+
+    result, started, waited = asyncio.run(scenario())
+    assert result == "ok"
+    assert started[1] - started[0] >= 0.2
+    assert waited >= 0.1
+    assert no_jitter == [0.01]
+
+
+def test_backoff_is_capped(no_jitter):
+    async def scenario():
+        scheduler = RateLimitScheduler(max_retries=4, backoff_base_seconds=0.01, backoff_max_seconds=0.03)
+        call = FlakyCall(*(status_error(503) for _ in range(4)))
+        return await scheduler.run("openai", call)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert no_jitter == [0.01, 0.02, 0.03, 0.03]
+
+
+def test_non_retryable_errors_and_exhausted_retries_are_raised(no_jitter):
+    async def run(call, max_retries=1):
+        return await RateLimitScheduler(max_retries=max_retries, backoff_base_seconds=0.01).run("openai", call)
+
+    bad_request = FlakyCall(status_error(400))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run(bad_request))
+    assert len(bad_request.started) == 1
+
+    overloaded = FlakyCall(status_error(503), status_error(503))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run(overloaded))
+    assert len(overloaded.started) == 2
+
+
+def test_model_limiter_charges_the_current_request():
+    async def scenario():
+        limiter = ProviderLimiter(requests_per_minute=100, tokens_per_minute=1000)
+        model_limiter = ModelRateLimiter(limiter)
+        with model_limiter.request(tokens=250, priority=PRIORITY_SYNTHESIS):
+            assert await model_limiter.aacquire()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.requests.level == pytest.approx(99, abs=0.1)
+    assert limiter.tokens.level == pytest.approx(750, abs=1)
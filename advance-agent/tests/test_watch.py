@@ -0,0 +1,47 @@
+import asyncio
+from src.config import WorkflowConfig
+from src.fakes import FakeFirecrawlService, FakeResearchChatModel
+from src.prompts import ResearchDiscoveryPrompts
+from src.workflow import Workflow
+
+QUERY = "CS -> Graph Learning"
+
+
+class FailingTitlesChatModel(FakeResearchChatModel):
+    def _respond(self, messages):
+        system, _ = self._texts(messages)
+        if system == ResearchDiscoveryPrompts.ADVANCEMENT_TITLES_SYSTEM:
+            raise RuntimeError("titles call failed")
+        return super()._respond(messages)
+
+
+def make_workflow(tmp_path, llm):
+    config = WorkflowConfig(
+        cache_dir=str(tmp_path),
+        search_num_results=6,
+        llm_cache_backend="none",
+        checkpoint_enabled=False,
+        results_index_enabled=False,
+        metrics_enabled=False
+    )
+    return Workflow(config, firecrawl=FakeFirecrawlService(), llm=llm)
+
+
+async def sweep(workflow):
+    try:
+        return await workflow.arun(QUERY, incremental=True)
+    finally:
+        await workflow.aclose()
+
+
+def test_failed_title_extraction_does_not_mark_sources_seen(tmp_path):
+    failed = asyncio.run(sweep(make_workflow(tmp_path, FailingTitlesChatModel(num_titles=4))))
+    assert failed.error_logs
+    assert not failed.advancements
+
+    workflow = make_workflow(tmp_path, FakeResearchChatModel(num_titles=4))
+    assert workflow.watch_store.seen(QUERY) == {}
+    retried = asyncio.run(sweep(workflow))
+    assert retried.error_logs == []
+    assert retried.output.new_sources == len(retried.search_results) > 0
+    assert len(retried.advancements) == 4
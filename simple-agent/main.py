@@ -1,9 +1,9 @@
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import StdioServerParameters
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from memory import ConversationMemory
+from mcp_session import MCPSessionManager, ToolResultCache
 import logging
 import asyncio
 import os
@@ -31,6 +31,13 @@ model = ChatOpenAI(
     openai_api_key=os.getenv("OPENAI_API_KEY")
 )
 
+# Cheaper model that folds old turns into the rolling conversation summary
+summary_model = ChatOpenAI(
+    model="gpt-4o-mini",
+    temperature=0,
+    openai_api_key=os.getenv("OPENAI_API_KEY")
+)
+
 server_params = StdioServerParameters(
     command="npx",
     env={
@@ -40,41 +47,42 @@ server_params = StdioServerParameters(
 )
 
 async def main():
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            tools = await load_mcp_tools(session)
-            agent = create_react_agent(model, tools)
-            
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are a helpful assistant that can scrape websites,
-                                crawl pages, and extract data using Firecrawl tools. Think
-                                step by step and use the appropriate tools to help the user"""
-                }
-            ]
+    # One warm Firecrawl MCP server for the whole session; repeated scrapes,
+    # searches and maps within 15 minutes are answered from the tool cache
+    async with MCPSessionManager(server_params, cache=ToolResultCache(ttl_seconds=15 * 60)) as mcp_manager:
+        tools = await mcp_manager.tools()
+        agent = create_react_agent(model, tools)
+        
+        memory = ConversationMemory(
+            system_prompt="""You are a helpful assistant that can scrape websites,
+                            crawl pages, and extract data using Firecrawl tools. Think
+                            step by step and use the appropriate tools to help the user""",
+            summarizer=summary_model
+        )
+        
+        logger.info("Available Tools - {}\n{}".format(", ".join([tool.name for tool in tools]), "-"*60))
+        
+        while True:
+            user_input = await asyncio.to_thread(input, "\nYou: ")
+            if user_input == "quit":
+                print("Goodbye...")
+                break
             
-            logger.info("Available Tools - {}\n{}".format(", ".join([tool.name for tool in tools]), "-"*60))
-            
-            while True:
-                user_input = input("\nYou: ")
-                if user_input == "quit":
-                    print("Goodbye...")
-                    break
+            if len(user_input) > 128000:
+                logger.warn("message length exceeded limits, message will be truncated")
                 
-                if len(user_input) > 128000:
-                    logger.warn("message length exceeded limits, message will be truncated")
-                    
-                messages.append({"role":"user", "content":user_input[:128000]})
+            user_input = user_input[:128000]
+            messages = memory.messages(user_input)
+            
+            try: 
+                agent_response = await agent.ainvoke({"messages": messages})
+                ai_message = agent_response["messages"][-1].content
+                print("\nAgent: ", ai_message)
+                # Keep the tool calls, tool results and reply produced for this turn
+                await memory.add_turn(user_input, agent_response["messages"][len(messages):])
+            except Exception as e:
+                logger.error(e)
                 
-                try: 
-                    agent_response = await agent.ainvoke({"messages": messages})
-                    ai_message = agent_response["messages"][-1].content
-                    print("\nAgent: ", ai_message)
-                except Exception as e:
-                    logger.error(e)
-                    
 
 if __name__ == "__main__":
     asyncio.run(main())
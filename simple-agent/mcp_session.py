@@ -0,0 +1,281 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, TextContent, Tool as MCPTool
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+import anyio
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Read-only Firecrawl tools whose results are safe to reuse; crawl jobs and
+# status checks change between calls and are never cached
+DEFAULT_CACHEABLE_TOOLS = {"firecrawl_scrape", "firecrawl_map", "firecrawl_search", "firecrawl_extract"}
+
+# Tools that are safe to send again after the connection dropped mid-call;
+# starting a crawl or deep research job twice would run (and bill) it twice
+DEFAULT_RETRYABLE_TOOLS = DEFAULT_CACHEABLE_TOOLS | {"firecrawl_check_crawl_status"}
+
+# Errors that mean the stdio transport itself is gone, not that the call was rejected
+TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError, EOFError)
+
+# Guards against a server that keeps handing out cursors
+MAX_TOOL_PAGES = 1000
+
+
+async def list_all_tools(session: ClientSession) -> List[MCPTool]:
+    """
+    Every tool the server offers, following tools/list pagination cursors.
+    """
+    tools: List[MCPTool] = []
+    cursor: Optional[str] = None
+    for _ in range(MAX_TOOL_PAGES):
+        page = await session.list_tools(cursor=cursor)
+        tools.extend(page.tools or [])
+        cursor = page.nextCursor
+        if cursor is None:
+            return tools
+    raise RuntimeError(f"MCP server returned more than {MAX_TOOL_PAGES} pages of tools")
+
+
+def convert_tool_result(result: CallToolResult) -> Tuple[Union[str, List[str]], Optional[List[Any]]]:
+    """
+    Split an MCP tool result into LangChain's (content, artifact) pair: the
+    text parts become the content (a single string when there is one), and
+    images or embedded resources the artifact. Error results raise
+    ToolException, so the agent sees the server's message.
+    """
+    texts = [part.text for part in result.content if isinstance(part, TextContent)]
+    others = [part for part in result.content if not isinstance(part, TextContent)]
+    content: Union[str, List[str]] = texts[0] if len(texts) == 1 else texts or ""
+    if result.isError:
+        raise ToolException(content)
+    return content, others or None
+
+
+class ToolResultCache:
+    """
+    In-memory LRU cache of MCP tool results keyed by tool name and arguments,
+    with a per-entry TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = 15 * 60, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CallToolResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> str:
+        payload = json.dumps([name, arguments], sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, name: str, arguments: Dict[str, Any]) -> Optional[CallToolResult]:
+        key = self.key(name, arguments)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, name: str, arguments: Dict[str, Any], result: CallToolResult) -> None:
+        key = self.key(name, arguments)
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class MCPSessionManager:
+    """
+    Keeps one MCP server process and ClientSession warm for the lifetime of
+    the app and hands out LangChain tools that call through it, so several
+    agents can share the connection. When the transport fails mid-call the
+    session is reconnected, and calls to tools that are safe to repeat are
+    retried once; other errors are raised unchanged. Results of read-only
+    tools are served from a ToolResultCache.
+
+    The stdio transport is owned by a background task, because its anyio
+    task group must be entered and exited from the same task; reconnecting
+    replaces that task.
+    """
+
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        cache: Optional[ToolResultCache] = None,
+        cacheable_tools: Iterable[str] = DEFAULT_CACHEABLE_TOOLS,
+        retryable_tools: Iterable[str] = DEFAULT_RETRYABLE_TOOLS,
+        connect_timeout: float = 60.0,
+    ):
+        self.server_params = server_params
+        self.cache = cache
+        self.cacheable_tools = set(cacheable_tools)
+        self.retryable_tools = set(retryable_tools)
+        self.connect_timeout = connect_timeout
+        self._session: Optional[ClientSession] = None
+        self._mcp_tools: List[MCPTool] = []
+        self._runner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def start(self) -> None:
+        """
+        Start the server and list its tools; returns once the session is ready.
+        """
+        await self._get_session()
+
+    async def tools(self) -> List[BaseTool]:
+        await self.start()
+        return [self._to_langchain_tool(tool) for tool in self._mcp_tools]
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        cacheable = self.cache is not None and name in self.cacheable_tools
+        if not cacheable:
+            return await self._call_with_reconnect(name, arguments)
+        cached = self.cache.get(name, arguments)
+        if cached is not None:
+            logger.info(f"Tool cache hit: {name}")
+            return cached
+
+        # Identical calls already in flight share one request
+        key = ToolResultCache.key(name, arguments)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_with_reconnect(name, arguments)
+            if not result.isError:
+                self.cache.set(name, arguments, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+    async def __aenter__(self) -> "MCPSessionManager":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _call_with_reconnect(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        session = await self._get_session()
+        try:
+            return await session.call_tool(name, arguments)
+        except Exception as e:
+            if not self._transport_failed(session, e):
+                raise
+            if name not in self.retryable_tools:
+                # The server may already have started it, so it is not sent again
+                logger.warning(f"MCP connection lost during {name} ({e!r}); reconnecting without retrying.")
+                await self._reconnect(session)
+                raise
+            logger.warning(f"MCP connection lost during {name} ({e!r}); reconnecting and retrying once.")
+            session = await self._reconnect(session)
+            return await session.call_tool(name, arguments)
+
+    def _transport_failed(self, session: ClientSession, error: Exception) -> bool:
+        # The runner task ended (server exited) or the session was already replaced
+        if self._session is not session or self._runner is None or self._runner.done():
+            return True
+        if isinstance(error, McpError):
+            return error.error.code == CONNECTION_CLOSED
+        return isinstance(error, TRANSPORT_ERRORS)
+
+    async def _get_session(self) -> ClientSession:
+        async with self._lock:
+            if self._session is None or self._runner is None or self._runner.done():
+                await self._connect()
+            return self._session
+
+    async def _reconnect(self, failed: ClientSession) -> ClientSession:
+        async with self._lock:
+            # Another caller may already have replaced the failed session
+            if self._session is failed:
+                await self._disconnect()
+                await self._connect()
+            return self._session
+
+    async def _connect(self) -> None:
+        # Caller holds the lock
+        await self._disconnect()
+        started = time.perf_counter()
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(ready, self._stop), name="mcp-session")
+        try:
+            self._session, self._mcp_tools = await asyncio.wait_for(asyncio.shield(ready), self.connect_timeout)
+        except BaseException:
+            await self._disconnect()
+            raise
+        logger.info(f"MCP session ready in {time.perf_counter() - started:.2f}s with {len(self._mcp_tools)} tools.")
+
+    async def _disconnect(self) -> None:
+        # Caller holds the lock
+        runner, stop = self._runner, self._stop
+        self._session = None
+        self._runner = None
+        self._stop = None
+        if runner is None:
+            return
+        stop.set()
+        try:
+            await asyncio.wait_for(runner, timeout=10)
+        except Exception:
+            runner.cancel()
+
+    async def _run(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    tools = await list_all_tools(session)
+                    ready.set_result((session, tools))
+                    await stop.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+                ready.exception()
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.error(f"MCP session ended unexpectedly: {e!r}")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    def _to_langchain_tool(self, tool: MCPTool) -> BaseTool:
+        async def call_tool(**arguments: Any):
+            return convert_tool_result(await self.call_tool(tool.name, arguments))
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call_tool,
+            response_format="content_and_artifact",
+            metadata=tool.annotations.model_dump() if tool.annotations else None,
+        )
@@ -0,0 +1,122 @@
+from typing import List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    get_buffer_string,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain the running memory of a conversation between a user and a web research assistant that uses Firecrawl tools.
+Update the summary with the new turns below. Keep facts the user shared, their goals and preferences, URLs visited,
+key findings from tool results, and open questions. Drop pleasantries and raw page content. Reply with the summary only,
+in at most {max_words} words."""
+
+
+class ConversationMemory:
+    """
+    Token-bounded chat history for the agent. The system prompt and the most
+    recent turns are sent verbatim; older turns are folded into a rolling
+    summary once the history exceeds `token_budget`. A turn is the user's
+    message plus every message the agent produced for it (tool calls, tool
+    results and the reply), so tool calls always stay paired with their results.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        summarizer: Optional[BaseChatModel] = None,
+        token_budget: int = 12000,
+        min_recent_turns: int = 2,
+        summary_tokens: int = 600,
+        tool_result_tokens: int = 2000,
+    ):
+        self.system_prompt = system_prompt
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.min_recent_turns = min_recent_turns
+        self.summary_tokens = summary_tokens
+        self.tool_result_tokens = tool_result_tokens
+        self.summary = ""
+        self.turns: List[List[BaseMessage]] = []
+        self._turn_tokens: List[int] = []
+
+    def messages(self, user_input: str) -> List[BaseMessage]:
+        """
+        Prompt for the next turn: system prompt (with the summary, if any),
+        the retained turns and the new user message.
+        """
+        system = self.system_prompt
+        if self.summary:
+            system = f"{system}\n\nSummary of the earlier conversation:\n{self.summary}"
+        history = [message for turn in self.turns for message in turn]
+        return [SystemMessage(content=system), *history, HumanMessage(content=user_input)]
+
+    async def add_turn(self, user_input: str, produced: List[BaseMessage]) -> None:
+        """
+        Store a finished turn (`produced` is what the agent appended after the
+        user message) and fold old turns into the summary if over budget.
+        """
+        turn = [HumanMessage(content=user_input)] + [self._trim_tool_result(m) for m in produced]
+        self.turns.append(turn)
+        self._turn_tokens.append(count_tokens_approximately(turn))
+        await self._compact()
+
+    def history_tokens(self) -> int:
+        """
+        Approximate tokens of the retained turns plus the summary.
+        """
+        summary_tokens = count_tokens_approximately([SystemMessage(content=self.summary)]) if self.summary else 0
+        return sum(self._turn_tokens) + summary_tokens
+
+    async def _compact(self) -> None:
+        # Reserve room for the summary that will replace the folded turns
+        folded: List[BaseMessage] = []
+        while (
+            len(self.turns) > self.min_recent_turns
+            and sum(self._turn_tokens) + self.summary_tokens > self.token_budget
+        ):
+            folded.extend(self.turns.pop(0))
+            self._turn_tokens.pop(0)
+        if folded:
+            self.summary = await self._summarize(folded)
+            logger.info(f"Folded {len(folded)} messages into the conversation summary; {len(self.turns)} turns kept verbatim.")
+
+    async def _summarize(self, folded: List[BaseMessage]) -> str:
+        transcript = get_buffer_string(folded)
+        if self.summarizer is not None:
+            try:
+                response = await self.summarizer.ainvoke([
+                    SystemMessage(content=SUMMARY_PROMPT.format(max_words=int(self.summary_tokens * 0.75))),
+                    HumanMessage(content=f"Current summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}")
+                ])
+                return self._truncate(str(response.content).strip(), self.summary_tokens)
+            except Exception as e:
+                logger.error(f"Summarizing conversation failed, keeping an extractive summary: {e}")
+        # Extractive fallback: first line of each user message and reply
+        lines = [self.summary] if self.summary else []
+        for message in folded:
+            if isinstance(message, (HumanMessage, AIMessage)) and message.content:
+                role = "User" if isinstance(message, HumanMessage) else "Assistant"
+                lines.append(f"{role}: {str(message.content).strip().splitlines()[0]}")
+        # Keep the newest lines when the fallback runs over budget
+        return "\n".join(lines)[-self.summary_tokens * 4:]
+
+    def _trim_tool_result(self, message: BaseMessage) -> BaseMessage:
+        if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+            return message
+        if count_tokens_approximately([message]) <= self.tool_result_tokens:
+            return message
+        content = self._truncate(message.content, self.tool_result_tokens) + "\n[... tool output truncated]"
+        return message.model_copy(update={"content": content})
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        # count_tokens_approximately assumes ~4 characters per token
+        return text[:max_tokens * 4]